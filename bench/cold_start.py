@@ -0,0 +1,118 @@
+"""
+Cold-start benchmark: process start -> first response byte, plus an
+import-time breakdown.
+
+Each run spawns a fresh interpreter that builds the WSGI application and
+serves one request in-process (no server, no network), the same work a
+serverless cold start does before its first response. The parent times it
+from just before spawning to the first body chunk the child produces.
+
+    python bench/cold_start.py                      # 10 runs of GET /search/suggest/?q=a
+    python bench/cold_start.py --path / --runs 20
+    python bench/cold_start.py --importtime --top 25
+
+The database settings come from the environment as usual (DATABASE_URL,
+...). Use a path that doesn't call TMDb, or the timing includes network.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import json, sys, time
+from urllib.parse import urlsplit
+
+t_start = time.time_ns()
+from django.core.wsgi import get_wsgi_application
+app = get_wsgi_application()
+t_app = time.time_ns()
+
+url = urlsplit(sys.argv[1])
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": url.path, "QUERY_STRING": url.query,
+    "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+    "wsgi.url_scheme": "http", "wsgi.input": sys.stdin.buffer, "wsgi.errors": sys.stderr,
+    "wsgi.version": (1, 0), "wsgi.multithread": False, "wsgi.multiprocess": True,
+    "wsgi.run_once": False,
+}
+status = []
+body = app(environ, lambda s, h, exc_info=None: status.append(s))
+for chunk in body:
+    if chunk:
+        break
+t_first_byte = time.time_ns()
+print(json.dumps({"status": status[0], "start": t_start, "app": t_app, "first_byte": t_first_byte}))
+"""
+
+
+def run_once(path, importtime=False):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "journal_project.settings"}
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD, path]
+
+    spawned = time.time_ns()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"child failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["spawned"] = spawned
+    result["stderr"] = proc.stderr
+    return result
+
+
+def parse_importtime(stderr):
+    """
+    {module: (self_us, cumulative_us)} from `python -X importtime` output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us), len(name) - len(name.lstrip()))
+    return modules
+
+
+def ms(ns):
+    return ns / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/search/suggest/?q=a")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true", help="also print the slowest imports")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    print(f"GET {args.path} -> {runs[0]['status']}  ({args.runs} cold runs)")
+    phases = {
+        "interpreter start": [ms(r["start"] - r["spawned"]) for r in runs],
+        "django setup + wsgi app": [ms(r["app"] - r["start"]) for r in runs],
+        "first request -> first byte": [ms(r["first_byte"] - r["app"]) for r in runs],
+        "total (spawn -> first byte)": [ms(r["first_byte"] - r["spawned"]) for r in runs],
+    }
+    print(f"{'phase':<30}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, values in phases.items():
+        print(f"{name:<30}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    if args.importtime:
+        modules = parse_importtime(run_once(args.path, importtime=True)["stderr"])
+        top_level = {n: v for n, v in modules.items() if v[2] == 1}
+        print(f"\nslowest top-level imports (cumulative), {len(modules)} modules loaded:")
+        for name, (self_us, cumulative_us, _) in sorted(top_level.items(), key=lambda kv: -kv[1][1])[: args.top]:
+            print(f"{cumulative_us / 1000:>10.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
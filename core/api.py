@@ -0,0 +1,269 @@
+"""
+Read-only JSON API, version 1 (mounted at /api/v1/).
+
+* ?fields=a,b,c selects a subset of each resource's public fields; only
+  those columns are read, via .values(), so no model instances are built.
+* List endpoints use keyset cursors: pass the response's "next" back as
+  ?cursor=.
+* Responses carry a weak ETag and answer If-None-Match with 304; bodies
+  are brotli- (if the optional `brotli` package is installed) or
+  gzip-compressed when the client accepts it.
+"""
+import datetime
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from django.views import View
+
+from .models import Genre, JournalEntry, Movie
+from .pagination import keyset_page
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_COMPRESS_BYTES = 512
+
+# public name -> ORM path
+MOVIE_FIELDS = {
+    "tmdb_id": "tmdb_id",
+    "title": "title",
+    "overview": "overview",
+    "poster_path": "poster_path",
+    "release_date": "release_date",
+    "popularity": "popularity",
+}
+MOVIE_DEFAULT_FIELDS = ("tmdb_id", "title", "poster_path", "release_date")
+
+JOURNAL_FIELDS = {
+    "id": "id",
+    "tmdb_id": "movie__tmdb_id",
+    "title": "movie__title",
+    "poster_path": "movie__poster_path",
+    "status": "status",
+    "rating": "rating",
+    "review": "review",
+    "mood": "mood",
+    "watched_date": "watched_date",
+    "comment_count": "comment_count",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+JOURNAL_DEFAULT_FIELDS = ("id", "tmdb_id", "title", "status", "rating", "updated_at")
+
+# sort name -> keyset fields (last one unique), descending?
+MOVIE_SORTS = {
+    "popular": (("popularity", "id"), True),
+    "newest": (("release_date", "id"), True),
+    "title": (("title", "id"), False),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_response(request, payload, status=200, cache_control="public, max-age=60"):
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+    etag = 'W/"%s"' % hashlib.sha1(body).hexdigest()
+
+    if_none_match = {t.strip() for t in request.headers.get("If-None-Match", "").split(",")}
+    if status == 200 and (etag in if_none_match or "*" in if_none_match):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        return response
+
+    response = HttpResponse(body, status=status, content_type="application/json")
+    if status == 200:
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+    _compress(request, response)
+    return response
+
+
+def _compress(request, response):
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < MIN_COMPRESS_BYTES:
+        return
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        content, encoding = brotli.compress(response.content, quality=5), "br"
+    elif "gzip" in accepted:
+        content, encoding = compress_string(response.content), "gzip"
+    else:
+        return
+    if len(content) < len(response.content):
+        response.content = content
+        response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(len(content))
+
+
+def _fields(request, allowed, default):
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(default)
+    names = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise ApiError(f"unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("invalid limit")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _int(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(f"invalid {name}")
+
+
+def _year(request, name):
+    year = _int(request, name)
+    if year is not None and not 1 <= year <= 9999:
+        raise ApiError(f"invalid {name}")
+    return year
+
+
+def _list_payload(qs, names, field_map, keyset, cursor, limit, descending=True):
+    """
+    Keyset-paginated .values() page, renamed to public field names.
+    """
+    paths = [field_map[n] for n in names]
+    qs = qs.values(*dict.fromkeys(paths + list(keyset)))
+    try:
+        rows, next_cursor = keyset_page(qs, keyset, cursor=cursor, limit=limit, descending=descending)
+    except ValueError:
+        raise ApiError("invalid cursor")
+    return {
+        "results": [{n: row[p] for n, p in zip(names, paths)} for row in rows],
+        "next": next_cursor,
+    }
+
+
+class ApiView(View):
+    cache_control = "public, max-age=60"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return _json_response(request, {"error": "method not allowed"}, status=405)
+        try:
+            payload = self.get_payload(request, *args, **kwargs)
+        except ApiError as e:
+            return _json_response(request, {"error": str(e)}, status=e.status)
+        return _json_response(request, payload, cache_control=self.cache_control)
+
+    def get_payload(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class MovieListApi(ApiView):
+    """
+    GET /api/v1/movies/?sort=popular|newest|title&genre=&year_from=&year_to=
+    """
+    def movie_queryset(self, request):
+        qs = Movie.objects.all()
+        genre = _int(request, "genre")
+        year_from = _year(request, "year_from")
+        year_to = _year(request, "year_to")
+        if genre:
+            qs = qs.filter(genres__tmdb_id=genre)
+        if year_from:
+            qs = qs.filter(release_date__gte=datetime.date(year_from, 1, 1))
+        if year_to:
+            qs = qs.filter(release_date__lte=datetime.date(year_to, 12, 31))
+        return qs
+
+    def get_payload(self, request):
+        sort = request.GET.get("sort", "popular")
+        if sort not in MOVIE_SORTS:
+            raise ApiError("invalid sort")
+        keyset, descending = MOVIE_SORTS[sort]
+        qs = self.movie_queryset(request)
+        if sort == "newest":
+            qs = qs.filter(release_date__isnull=False)
+        names = _fields(request, MOVIE_FIELDS, MOVIE_DEFAULT_FIELDS)
+        return _list_payload(
+            qs, names, MOVIE_FIELDS, keyset,
+            request.GET.get("cursor"), _limit(request), descending=descending,
+        )
+
+
+class MovieSearchApi(MovieListApi):
+    """
+    GET /api/v1/search/?q= — local catalog only, most popular first.
+    """
+    def get_payload(self, request):
+        query = request.GET.get("q", "").strip()
+        if not query:
+            raise ApiError("q is required")
+        qs = self.movie_queryset(request).filter(title__icontains=query)
+        names = _fields(request, MOVIE_FIELDS, MOVIE_DEFAULT_FIELDS)
+        return _list_payload(
+            qs, names, MOVIE_FIELDS, ("popularity", "id"),
+            request.GET.get("cursor"), _limit(request),
+        )
+
+
+class MovieDetailApi(ApiView):
+    """
+    GET /api/v1/movies/<tmdb_id>/; "genres" may be requested as a field.
+    """
+    def get_payload(self, request, tmdb_id):
+        allowed = {**MOVIE_FIELDS, "genres": None}
+        names = _fields(request, allowed, (*MOVIE_FIELDS, "genres"))
+        columns = [MOVIE_FIELDS[n] for n in names if n != "genres"]
+        row = Movie.objects.filter(tmdb_id=tmdb_id).values("id", *columns).first()
+        if row is None:
+            raise ApiError("not found", status=404)
+
+        result = {n: row[MOVIE_FIELDS[n]] for n in names if n != "genres"}
+        if "genres" in names:
+            result["genres"] = [
+                {"id": g["tmdb_id"], "name": g["name"]}
+                for g in Genre.objects.filter(movies__id=row["id"]).values("tmdb_id", "name")
+            ]
+        return result
+
+
+class JournalApi(ApiView):
+    """
+    GET /api/v1/journal/?status= — the signed-in user's entries, most
+    recently updated first.
+    """
+    cache_control = "private, max-age=0"
+
+    def get_payload(self, request):
+        if not request.user.is_authenticated:
+            raise ApiError("authentication required", status=401)
+        qs = JournalEntry.objects.filter(user=request.user)
+        status = request.GET.get("status")
+        if status:
+            qs = qs.filter(status=status)
+        names = _fields(request, JOURNAL_FIELDS, JOURNAL_DEFAULT_FIELDS)
+        return _list_payload(
+            qs, names, JOURNAL_FIELDS, ("updated_at", "id"),
+            request.GET.get("cursor"), _limit(request),
+        )
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .lazy import lazy_view
+
+urlpatterns = [
+    path("movies/", lazy_view("core.api.MovieListApi"), name="api_movies"),
+    path("movies/<int:tmdb_id>/", lazy_view("core.api.MovieDetailApi"), name="api_movie_detail"),
+    path("search/", lazy_view("core.api.MovieSearchApi"), name="api_search"),
+    path("journal/", lazy_view("core.api.JournalApi"), name="api_journal"),
+]
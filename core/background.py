@@ -0,0 +1,41 @@
+"""
+Minimal background path: run work after the current transaction commits,
+on a small per-process thread pool, so the request doesn't wait for it.
+
+Set BACKGROUND_SYNC = True to run jobs inline (useful in tests and
+management commands).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS, thread_name_prefix="background"
+        )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("background job %s failed", getattr(fn, "__name__", fn))
+    finally:
+        close_old_connections()
+
+
+def run_in_background(fn, *args, **kwargs):
+    if settings.BACKGROUND_SYNC:
+        fn(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, fn, args, kwargs))
@@ -0,0 +1,112 @@
+"""
+Atomic counters shared by every process, for the TMDb rate limiter
+(core/ratelimit.py) and fetch metrics (core/tmdb.py).
+
+Where they live follows the default cache:
+
+* Redis or memcached: in the cache, whose incr is atomic on the server.
+* DatabaseCache (CACHE_TABLE): in SharedCounter rows, bumped by one
+  INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement. The cache table
+  itself won't do: DatabaseCache.incr() is a get() then a set(), so
+  concurrent workers would lose increments.
+* anything else (LocMemCache, the default): in the cache, atomic but
+  private to each process. is_shared() is False and the core.W001 system
+  check warns about it.
+"""
+import random
+import time
+
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import SharedCounter
+
+# share of table increments that also delete expired rows
+CULL_RATE = 0.001
+
+UPSERT_SQL = """
+INSERT INTO {table} (name, value, expires) VALUES (%s, %s, %s)
+ON CONFLICT (name) DO UPDATE SET
+    value = CASE WHEN {table}.expires <= %s THEN excluded.value ELSE {table}.value + excluded.value END,
+    expires = CASE WHEN {table}.expires <= %s THEN excluded.expires ELSE {table}.expires END
+RETURNING value
+"""
+
+
+def _uses_table():
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], DatabaseCache)
+
+
+def is_shared():
+    """
+    True if every process sees the same counters.
+    """
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], (DatabaseCache, RedisCache, BaseMemcachedCache))
+
+
+def _db():
+    return router.db_for_write(SharedCounter)
+
+
+def _incr_row(key, amount, timeout):
+    now = time.time()
+    expires = now + timeout if timeout is not None else None
+    connection = connections[_db()]
+    sql = UPSERT_SQL.format(table=connection.ops.quote_name(SharedCounter._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [key, amount, expires, now, now])
+        value = cursor.fetchone()[0]
+    if random.random() < CULL_RATE:
+        SharedCounter.objects.using(_db()).filter(expires__lte=now).delete()
+    return value
+
+
+def incr(key, amount=1, timeout=None):
+    """
+    Add `amount` to `key` and return the new value. A missing (or expired)
+    key starts from zero and expires `timeout` seconds later; None = never.
+    """
+    if _uses_table():
+        return _incr_row(key, amount, timeout)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # key missing (first hit or evicted); add() keeps racing callers safe
+        if cache.add(key, amount, timeout=timeout):
+            return amount
+        return cache.incr(key, amount)
+
+
+def get_many(keys):
+    """
+    {key: value} for the keys that exist.
+    """
+    if _uses_table():
+        live = Q(expires__isnull=True) | Q(expires__gt=time.time())
+        return dict(
+            SharedCounter.objects.using(_db()).filter(live, name__in=list(keys)).values_list("name", "value")
+        )
+    return cache.get_many(keys)
+
+
+def get(key, default=0):
+    return get_many([key]).get(key, default)
+
+
+def check_shared_counters(app_configs, **kwargs):
+    if is_shared():
+        return []
+    backend = type(caches[DEFAULT_CACHE_ALIAS]).__name__
+    return [
+        checks.Warning(
+            f"The {backend} cache is per process: the TMDb rate limit and fetch "
+            "metrics are counted separately in every worker.",
+            hint="Set REDIS_URL or CACHE_TABLE to share them across the deployment.",
+            id="core.W001",
+        )
+    ]
@@ -0,0 +1,142 @@
+"""
+Primary/replica routing for the core app.
+
+Reads of core models (catalog and journal) go to a healthy replica from
+settings.DATABASE_REPLICAS; everything else, and every write, goes to
+"default". Once a request writes, the rest of that request reads from the
+primary. PrimaryPinningMiddleware also sets a short-lived cookie after a
+write, so the user's next requests (e.g. MyJournalView right after saving
+an entry) read their own writes until replicas have caught up.
+
+Outside a request (management commands, background jobs) reads still use
+replicas, but nothing is pinned.
+
+Replica health is checked at most every REPLICA_HEALTH_INTERVAL seconds
+per process: a replica that can't be reached, or (on Postgres) lags by
+more than REPLICA_MAX_LAG seconds, is skipped for REPLICA_RETRY_SECONDS.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REPLICA_APPS = {"core"}
+
+_request_state = contextvars.ContextVar("db_request_state", default=None)
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = {}
+        self._down_until = {}
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            if self._down_until.get(alias, 0) > now:
+                return False
+            due = now - self._checked_at.get(alias, float("-inf")) >= settings.REPLICA_HEALTH_INTERVAL
+            if due:
+                self._checked_at[alias] = now
+        if due and not self._probe(alias):
+            self.mark_down(alias)
+            return False
+        return True
+
+    def _probe(self, alias):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    )
+                    (lag,) = cursor.fetchone()
+                if lag > settings.REPLICA_MAX_LAG:
+                    logger.warning("replica %s lagging %.1fs; skipping", alias, lag)
+                    return False
+        except Exception as e:
+            logger.warning("replica %s unavailable: %s", alias, e)
+            return False
+        return True
+
+
+health = ReplicaHealth()
+
+
+def choose_replica():
+    """
+    A healthy replica alias, or the primary if none is available.
+    """
+    candidates = [a for a in settings.DATABASE_REPLICAS if health.is_healthy(a)]
+    return random.choice(candidates) if candidates else DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        if hints.get("instance") is not None:
+            return None  # follow the instance's own database
+        state = _request_state.get()
+        if state is not None and state["pinned"]:
+            return DEFAULT_DB_ALIAS
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["pinned"] = True
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinningMiddleware:
+    """
+    Read-your-writes: pin reads to the primary for the rest of a request
+    that wrote, and for REPLICA_STICKY_SECONDS afterwards via a cookie.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            sticky = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+
+        token = _request_state.set({"pinned": sticky, "wrote": False})
+        try:
+            response = self.get_response(request)
+            state = _request_state.get()
+        finally:
+            _request_state.reset(token)
+
+        if state["wrote"] and request.method not in SAFE_METHODS and request.user.is_authenticated:
+            until = time.time() + settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, f"{until:.0f}",
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,164 @@
+"""
+Per-worker snapshot of the top of the catalog for the home grid.
+
+The first pages of HomeView's default order are the same for everyone, so
+each worker keeps the top HOTSET_SIZE movies in flat arrays and serves
+those pages without building Movie instances. Records handed to templates
+are small __slots__ objects carrying only what the grid shows.
+
+The snapshot is built in the background (core.background), never inside a
+request; until the first build finishes, get_hotset() returns None and the
+grid is read from the database. It is rebuilt when the catalog version in
+the cache is bumped (refresh_movies and compute_trending do this) or when
+it is older than HOTSET_MAX_AGE seconds; the old snapshot keeps serving
+until the new one is swapped in. The age limit matters when the cache is
+per-process, because version bumps from other processes are not seen.
+"""
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .background import run_in_background
+
+CATALOG_VERSION_KEY = "catalog:version"
+VERSION_CHECK_INTERVAL = 1.0
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        if not cache.add(CATALOG_VERSION_KEY, 1, timeout=None):
+            cache.incr(CATALOG_VERSION_KEY)
+
+
+def catalog_version():
+    return cache.get(CATALOG_VERSION_KEY, 0)
+
+
+class GridMovie:
+    __slots__ = ("tmdb_id", "title", "poster_path", "year", "popularity")
+
+    def __init__(self, tmdb_id, title, poster_path, year, popularity):
+        self.tmdb_id = tmdb_id
+        self.title = title
+        self.poster_path = poster_path
+        self.year = year
+        self.popularity = popularity
+
+
+class HotSet:
+    """
+    Immutable columnar snapshot; `total` is the size of the full result set.
+    """
+    __slots__ = ("version", "sort", "built_at", "total", "tmdb_ids", "years", "popularity", "titles", "posters")
+
+    def __init__(self, version, sort, rows, total):
+        self.version = version
+        self.sort = sort
+        self.built_at = time.monotonic()
+        self.total = total
+        self.tmdb_ids = array("q")
+        self.years = array("H")        # 0 = unknown
+        self.popularity = array("d")
+        titles, posters = [], []
+        for tmdb_id, title, poster_path, release_date, popularity in rows:
+            self.tmdb_ids.append(tmdb_id)
+            self.years.append(release_date.year if release_date else 0)
+            self.popularity.append(popularity or 0.0)
+            titles.append(title)
+            posters.append(poster_path or "")
+        self.titles = tuple(titles)
+        self.posters = tuple(posters)
+
+    def __len__(self):
+        return len(self.tmdb_ids)
+
+    def records(self, start, stop):
+        return [
+            GridMovie(self.tmdb_ids[i], self.titles[i], self.posters[i], self.years[i] or None, self.popularity[i])
+            for i in range(start, min(stop, len(self)))
+        ]
+
+
+class HotSetSequence:
+    """
+    Paginator-compatible view over the snapshot: slices inside it come from
+    memory, anything past it from `fallback_qs`.
+    """
+    def __init__(self, hotset, fallback_qs):
+        self.hotset = hotset
+        self.fallback_qs = fallback_qs
+
+    def __len__(self):
+        return self.hotset.total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop if key.stop is not None else self.hotset.total
+        if stop <= len(self.hotset):
+            return self.hotset.records(start, stop)
+        return list(self.fallback_qs[start:stop])
+
+
+class HotSetCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hotset = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+
+    def get(self, build):
+        """
+        Current snapshot, or None until the first build finishes. A missing
+        or stale snapshot is rebuilt in the background via build(version);
+        meanwhile the old one keeps serving.
+        """
+        hotset = self._hotset
+        if hotset is not None:
+            now = time.monotonic()
+            if now - hotset.built_at < settings.HOTSET_MAX_AGE:
+                if now - self._checked_at < VERSION_CHECK_INTERVAL:
+                    return hotset
+                self._checked_at = now
+                if catalog_version() == hotset.version:
+                    return hotset
+        self._schedule_rebuild(build)
+        # BACKGROUND_SYNC builds inline, so this may already be the new one
+        return self._hotset
+
+    def _schedule_rebuild(self, build):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        run_in_background(self._rebuild, build)
+
+    def _rebuild(self, build):
+        try:
+            self._hotset = build(catalog_version())
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+_cache = HotSetCache()
+
+
+def get_hotset(listing):
+    """
+    Snapshot of the home grid's default ordering, or None while the first
+    one is still being built. `listing()` returns (sort name, queryset or
+    TrendingSequence); only its first HOTSET_SIZE rows are kept, read as
+    plain tuples.
+    """
+    def build(version):
+        sort, qs = listing()
+        rows = qs.values_list("tmdb_id", "title", "poster_path", "release_date", "popularity")
+        return HotSet(version, sort, rows[: settings.HOTSET_SIZE], qs.count())
+
+    return _cache.get(build)
@@ -0,0 +1,159 @@
+"""
+Full-text search over one user's own journal: entry moods and reviews, and
+the comments they wrote. The index is built by migration 0011 (a GIN-indexed
+tsvector per table on PostgreSQL, an FTS5 table on SQLite); both are
+maintained by the database itself, and both are keyed by user so a search
+only touches the searching user's documents.
+
+Each hit is one entry or one comment. Hits are ranked (ts_rank_cd /
+bm25, mood weighted above review text) and paged with a keyset cursor on
+(rank, kind, doc_id). Snippets come back with \\x02 / \\x03 around matched
+terms; highlight() escapes the text and turns those into <mark> tags.
+"""
+import re
+
+from django.db import connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import JournalEntry
+from .pagination import decode_cursor, encode_cursor
+
+START_SEL = "\x02"
+STOP_SEL = "\x03"
+_WORD_RE = re.compile(r"\w+")
+
+PG_SEARCH_SQL = """
+WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query),
+hits AS (
+    SELECT 'e' AS kind, e.id AS doc_id, e.id AS entry_id,
+           ts_rank_cd(e.search_vector, q.query)::float8 AS rank
+    FROM core_journalentry e, q
+    WHERE e.user_id = %s AND e.search_vector @@ q.query
+    UNION ALL
+    SELECT 'c', c.id, c.entry_id, ts_rank_cd(c.search_vector, q.query)::float8
+    FROM core_comment c, q
+    WHERE c.user_id = %s AND c.search_vector @@ q.query
+),
+page AS (
+    SELECT * FROM hits {after}
+    ORDER BY rank DESC, kind DESC, doc_id DESC
+    LIMIT %s
+)
+SELECT page.kind, page.doc_id, page.entry_id, page.rank,
+       ts_headline('english', translate(
+           CASE page.kind WHEN 'e' THEN concat_ws(' ', e.mood, e.review) ELSE c.text END,
+           chr(2) || chr(3), ''
+       ), q.query, 'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxFragments=2, MaxWords=24, MinWords=8')
+FROM page
+CROSS JOIN q
+LEFT JOIN core_journalentry e ON page.kind = 'e' AND e.id = page.doc_id
+LEFT JOIN core_comment c ON page.kind = 'c' AND c.id = page.doc_id
+ORDER BY page.rank DESC, page.kind DESC, page.doc_id DESC
+"""
+
+SQLITE_SEARCH_SQL = """
+SELECT kind, doc_id, entry_id, rank, snippet FROM (
+    SELECT kind, doc_id, entry_id,
+           -bm25(core_journal_fts, 0.0, 2.0, 1.0) AS rank,
+           -- body first, mood if the match is only there; never the owner token
+           CASE WHEN instr(snippet(core_journal_fts, 2, char(2), char(3), '…', 16), char(2))
+                THEN snippet(core_journal_fts, 2, char(2), char(3), '…', 16)
+                ELSE snippet(core_journal_fts, 1, char(2), char(3), '…', 16) END AS snippet
+    FROM core_journal_fts
+    WHERE core_journal_fts MATCH %s
+) {after}
+ORDER BY rank DESC, kind DESC, doc_id DESC
+LIMIT %s
+"""
+
+
+class SearchHit:
+    __slots__ = ("kind", "doc_id", "entry_id", "rank", "snippet", "entry")
+
+    def __init__(self, kind, doc_id, entry_id, rank, snippet):
+        self.kind = kind            # "e" (entry) or "c" (comment)
+        self.doc_id = doc_id
+        self.entry_id = entry_id
+        self.rank = rank
+        self.snippet = snippet
+        self.entry = None
+
+    @property
+    def is_comment(self):
+        return self.kind == "c"
+
+    @property
+    def highlighted(self):
+        return highlight(self.snippet)
+
+
+def highlight(snippet):
+    """
+    HTML-escape a snippet and wrap the sentinel-marked terms in <mark>.
+    """
+    marked = escape(snippet or "").replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+    return mark_safe(marked)
+
+
+def fts5_query(user_id, query):
+    """
+    FTS5 MATCH expression for `query` restricted to `user_id`'s rows. Terms
+    are quoted, so operators typed by the user are searched as words.
+    """
+    words = _WORD_RE.findall(query)
+    if not words:
+        return None
+    terms = " ".join('"%s"' % w.replace('"', '""') for w in words)
+    return f'owner : "u{int(user_id)}" AND {{mood body}} : ({terms})'
+
+
+def search_journal(user, query, cursor=None, limit=20):
+    """
+    One ranked page of `user`'s entries and comments matching `query`:
+    (hits, next_cursor). Each hit's `entry` (with movie) is loaded in one
+    batched query. Raises ValueError for a malformed cursor.
+    """
+    query = (query or "").strip()
+    alias = router.db_for_read(JournalEntry)
+    connection = connections[alias]
+    if not query or connection.vendor not in ("postgresql", "sqlite"):
+        return [], None
+
+    after, after_params = "", []
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 3 or values[1] not in ("e", "c"):
+            raise ValueError("invalid cursor")
+        try:
+            after_params = [float(values[0]), values[1], int(values[2])]
+        except (TypeError, ValueError) as e:
+            raise ValueError("invalid cursor") from e
+        after = "WHERE (rank, kind, doc_id) < (%s, %s, %s)"
+
+    if connection.vendor == "postgresql":
+        sql = PG_SEARCH_SQL.format(after=after)
+        params = [query, user.pk, user.pk, *after_params, limit + 1]
+    else:
+        match = fts5_query(user.pk, query)
+        if match is None:
+            return [], None
+        sql = SQLITE_SEARCH_SQL.format(after=after)
+        params = [match, *after_params, limit + 1]
+
+    with connection.cursor() as c:
+        c.execute(sql, params)
+        hits = [SearchHit(*row) for row in c.fetchall()]
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last = hits[-1]
+        next_cursor = encode_cursor([last.rank, last.kind, last.doc_id])
+
+    entries = JournalEntry.objects.using(alias).select_related("movie").in_bulk(
+        {h.entry_id for h in hits}
+    )
+    for hit in hits:
+        hit.entry = entries.get(hit.entry_id)
+    return [h for h in hits if h.entry is not None], next_cursor
@@ -0,0 +1,31 @@
+"""
+Lazy view references for URLconfs.
+
+lazy_view("core.views.HomeView") returns a view function that imports its
+module the first time a request is routed to it, so loading the URLconf
+(which Django does on the first request) doesn't import every view module
+and its dependencies up front.
+
+Attributes that middleware reads off the callback before calling it (e.g.
+csrf_exempt) are not visible until the view has been imported once; don't
+use lazy_view for views that rely on them.
+"""
+from importlib import import_module
+
+
+def lazy_view(dotted_path, **initkwargs):
+    module_path, name = dotted_path.rsplit(".", 1)
+    resolved = None
+
+    def view(request, *args, **kwargs):
+        nonlocal resolved
+        if resolved is None:
+            target = getattr(import_module(module_path), name)
+            resolved = target.as_view(**initkwargs) if isinstance(target, type) else target
+        return resolved(request, *args, **kwargs)
+
+    view.__name__ = name
+    view.__qualname__ = name
+    view.__module__ = module_path
+    view.lazy_path = dotted_path
+    return view
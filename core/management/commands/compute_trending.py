@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute the trending ranking shown on the home grid (run periodically)"
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_trending()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {count} movies."))
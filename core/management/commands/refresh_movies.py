@@ -1,17 +1,33 @@
 import requests
 from django.core.management.base import BaseCommand
-from core.models import Movie  # adjust if needed
+from core.models import Genre, Movie  # adjust if needed
+from core.hotset import bump_catalog_version
+from core.ratelimit import BACKGROUND, RateLimited
+from core.tmdb import TMDB_API_URL, store_genres, tmdb_get, upsert_movie
 from django.conf import settings
 
 
 class Command(BaseCommand):
-    help = "Refresh movies from TMDb API"
+    help = "Refresh movies from TMDb API (uses the background rate-limit lane)"
 
     def handle(self, *args, **kwargs):
         api_key = settings.TMDB_API_KEY
-        url = "https://api.themoviedb.org/3/movie/popular"
+        url = f"{TMDB_API_URL}/movie/popular"
         total_added = 0
 
+        # genre names first, so list results' genre_ids can be linked
+        try:
+            response = tmdb_get(
+                f"{TMDB_API_URL}/genre/movie/list",
+                params={"api_key": api_key, "language": "en-US"},
+                lane=BACKGROUND,
+                timeout=5,
+            )
+            store_genres(response.json().get("genres"))
+        except (requests.RequestException, RateLimited) as e:
+            self.stderr.write(self.style.ERROR(f"Error fetching genres: {e}"))
+        genre_map = dict(Genre.objects.values_list("tmdb_id", "pk"))
+
         for page in range(1, 6):  # Get pages 1 to 5 (about 100 movies)
             params = {
                 "api_key": api_key,
@@ -20,26 +36,19 @@ class Command(BaseCommand):
             }
 
             try:
-                response = requests.get(url, params=params, timeout=5)
-                response.raise_for_status()
+                response = tmdb_get(url, params=params, lane=BACKGROUND, timeout=5)
                 data = response.json()
 
                 for movie in data.get("results", []):
-                    obj, created = Movie.objects.update_or_create(
-                        tmdb_id=movie["id"],
-                        defaults={
-                            "title": movie["title"],
-                            "overview": movie.get("overview", ""),
-                            "release_date": movie.get("release_date"),
-                            "poster_path": movie.get("poster_path", ""),
-                        }
-                    )
-                    if created:
+                    existed = Movie.objects.filter(tmdb_id=movie["id"]).exists()
+                    upsert_movie(movie, genre_map=genre_map)
+                    if not existed:
                         total_added += 1
 
                 self.stdout.write(self.style.SUCCESS(f"Page {page} done."))
 
-            except requests.RequestException as e:
+            except (requests.RequestException, RateLimited) as e:
                 self.stderr.write(self.style.ERROR(f"Error fetching page {page}: {e}"))
 
+        bump_catalog_version()
         self.stdout.write(self.style.SUCCESS(f"Added {total_added} new movies."))
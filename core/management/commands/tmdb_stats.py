@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import is_shared
+from core.ratelimit import lane_stats
+from core.tmdb import tmdb_stats
+
+
+class Command(BaseCommand):
+    help = "Show TMDb fetch counters (cache hits, upstream calls, coalesced requests) and rate-limit lanes"
+
+    def handle(self, *args, **kwargs):
+        if not is_shared():
+            # this process has counted nothing; the workers' counters aren't reachable
+            self.stderr.write(self.style.WARNING(
+                "TMDb metrics are per process with the configured cache, so they can't be "
+                "read from here. Set REDIS_URL or CACHE_TABLE to share them."
+            ))
+            return
+
+        stats = tmdb_stats()
+        for name, value in stats.items():
+            self.stdout.write(f"{name:<18} {value}")
+
+        if stats["requests"]:
+            saved = stats["requests"] - stats["upstream_calls"]
+            self.stdout.write(self.style.SUCCESS(
+                f"{saved} of {stats['requests']} requests avoided an upstream call."
+            ))
+
+        limits = lane_stats()
+        self.stdout.write(
+            f"\nrate limit         {limits['rate']:.1f}/{limits['rate_limit']:.1f} req/s"
+            f"  (429s: {limits['throttled']}, blocked for {limits['blocked_for']:.1f}s)"
+        )
+        for lane, lane_values in limits["lanes"].items():
+            self.stdout.write(
+                f"{lane:<18} {lane_values['utilization']:6.1%} of budget over the last minute"
+                f"  granted={lane_values['granted']} denied={lane_values['denied']}"
+                f" avg_wait={lane_values['avg_wait_ms']:.0f}ms"
+            )
@@ -0,0 +1,70 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.counters import is_shared
+from core.models import QueryStat
+from core.querylog import prune_queries, top_queries
+from core.ratelimit import BACKGROUND
+from core.tmdb import movie_detail_request, search_request, tmdb_stats, warm_tmdb_data
+
+REQUESTS = {
+    QueryStat.KIND_SEARCH: search_request,
+    QueryStat.KIND_MOVIE: movie_detail_request,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-fetch the most requested TMDb searches and movie details before their "
+        "cached responses expire (run more often than TMDB_CACHE_TTL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=settings.WARM_TOP_K,
+                            help="how many searches and how many movies to warm")
+        parser.add_argument("--ahead", type=int, default=settings.WARM_AHEAD,
+                            help="refresh entries expiring within this many seconds")
+        parser.add_argument("--workers", type=int, default=settings.WARM_WORKERS)
+
+    def handle(self, *args, **options):
+        pruned = prune_queries()
+        jobs = [
+            (kind, key)
+            for kind in REQUESTS
+            for key in top_queries(kind, options["top"])
+        ]
+
+        def warm(job):
+            kind, key = job
+            try:
+                url, params = REQUESTS[kind](key)
+                return kind, key, warm_tmdb_data(url, params, ahead=options["ahead"], lane=BACKGROUND)
+            finally:
+                close_old_connections()
+
+        # TMDb calls take background-lane tokens, so this never crowds out users
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            results = list(pool.map(warm, jobs))
+
+        outcomes = Counter(outcome for _, _, outcome in results)
+        for kind in REQUESTS:
+            warmed = [key for k, key, outcome in results if k == kind and outcome == "warmed"]
+            QueryStat.objects.filter(kind=kind, key__in=warmed).update(last_warmed_at=timezone.now())
+
+        self.stdout.write(
+            f"{len(jobs)} candidates: {outcomes['warmed']} warmed, {outcomes['fresh']} still fresh, "
+            f"{outcomes['busy']} being fetched, {outcomes['failed']} failed; "
+            f"{pruned} stale counters pruned."
+        )
+        if not is_shared():
+            return  # the ratio would only cover this command's own requests
+        stats = tmdb_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Warm-hit ratio: {stats['warm_hit_ratio']:.1%} "
+            f"({stats['warm_hits']} of {stats['requests']} requests served from warmed entries)."
+        ))
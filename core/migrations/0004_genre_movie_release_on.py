@@ -0,0 +1,70 @@
+import datetime
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 1000
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def backfill_release_on(apps, schema_editor):
+    """
+    Copy release_date strings into release_on in primary-key batches, each
+    in its own short transaction, so no lock is held across the whole table.
+    """
+    Movie = apps.get_model("core", "Movie")
+    db = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=db):
+            batch = list(
+                Movie.objects.using(db)
+                .filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "release_date")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for movie in batch:
+                movie.release_on = parse_date(movie.release_date)
+            Movie.objects.using(db).bulk_update(batch, ["release_on"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_journalentry_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.IntegerField(unique=True)),
+                ('name', models.CharField(max_length=64)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='movies', to='core.genre'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='release_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_release_on, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_genre_movie_release_on'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='movie',
+            name='release_date',
+        ),
+        migrations.RenameField(
+            model_name='movie',
+            old_name='release_on',
+            new_name='release_date',
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-popularity', 'id'], name='movie_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['release_date', 'popularity'], name='movie_release_pop_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['title'], name='movie_title_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    JournalEntry = apps.get_model("core", "JournalEntry")
+    Comment = apps.get_model("core", "Comment")
+    db = schema_editor.connection.alias
+    counts = (
+        Comment.objects.using(db)
+        .filter(entry=OuterRef("pk"))
+        .order_by()
+        .values("entry")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    JournalEntry.objects.using(db).filter(pk__in=Comment.objects.using(db).values("entry")).update(
+        comment_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_movie_release_date_to_datefield'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['entry', 'created_at', 'id'], name='comment_entry_created_idx'),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
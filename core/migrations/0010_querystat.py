@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_journalentry_user_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('search', 'Search'), ('movie', 'Movie detail')], max_length=10)),
+                ('key', models.CharField(max_length=255)),
+                ('hits', models.PositiveBigIntegerField(default=0)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_warmed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', '-hits'], name='querystat_kind_hits_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='querystat_kind_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,134 @@
+"""
+Full-text index over journal entries (mood + review) and comments, used by
+core/journal_search.py. Built in raw SQL per vendor:
+
+* PostgreSQL: a stored generated tsvector column on each table and a GIN
+  index on (user_id, search_vector). The composite GIN needs btree_gin; if
+  the extension can't be created, the index falls back to search_vector
+  alone.
+* SQLite: one FTS5 table, core_journal_fts, kept in sync by triggers. Rows
+  carry an "owner" token (u<user_id>) so a user's search intersects with
+  that user's posting list rather than filtering everyone's matches.
+
+Other backends get no index and search is unavailable.
+
+On SQLite, Django alters some columns by rebuilding the table, which drops
+its triggers: a later migration that does that to core_journalentry or
+core_comment must recreate the *_fts_* triggers.
+"""
+from django.db import DatabaseError, migrations, transaction
+
+PG_VECTORS = {
+    "core_journalentry": (
+        "setweight(to_tsvector('english', coalesce(mood, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(review, '')), 'B')"
+    ),
+    "core_comment": "to_tsvector('english', coalesce(text, ''))",
+}
+PG_INDEXES = {
+    "core_journalentry": "journal_search_idx",
+    "core_comment": "comment_search_idx",
+}
+
+
+def _sqlite_clean(expr):
+    # the \x02 / \x03 sentinels mark highlights in snippet(); never store them
+    return f"replace(replace(coalesce({expr}, ''), char(2), ''), char(3), '')"
+
+
+SQLITE_ENTRY_ROW = (
+    "INSERT INTO core_journal_fts(rowid, owner, mood, body, kind, doc_id, entry_id) "
+    f"VALUES (new.id * 2, 'u' || new.user_id, {_sqlite_clean('new.mood')}, "
+    f"{_sqlite_clean('new.review')}, 'e', new.id, new.id);"
+)
+SQLITE_COMMENT_ROW = (
+    "INSERT INTO core_journal_fts(rowid, owner, mood, body, kind, doc_id, entry_id) "
+    f"VALUES (new.id * 2 + 1, 'u' || new.user_id, '', {_sqlite_clean('new.text')}, "
+    "'c', new.id, new.entry_id);"
+)
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_journal_fts USING fts5("
+    "owner, mood, body, kind UNINDEXED, doc_id UNINDEXED, entry_id UNINDEXED, "
+    "tokenize = 'porter unicode61 remove_diacritics 2')",
+
+    "CREATE TRIGGER core_journalentry_fts_ai AFTER INSERT ON core_journalentry BEGIN "
+    f"{SQLITE_ENTRY_ROW} END",
+    "CREATE TRIGGER core_journalentry_fts_au AFTER UPDATE OF mood, review, user_id ON core_journalentry BEGIN "
+    f"DELETE FROM core_journal_fts WHERE rowid = old.id * 2; {SQLITE_ENTRY_ROW} END",
+    "CREATE TRIGGER core_journalentry_fts_ad AFTER DELETE ON core_journalentry BEGIN "
+    "DELETE FROM core_journal_fts WHERE rowid = old.id * 2; END",
+
+    "CREATE TRIGGER core_comment_fts_ai AFTER INSERT ON core_comment BEGIN "
+    f"{SQLITE_COMMENT_ROW} END",
+    "CREATE TRIGGER core_comment_fts_au AFTER UPDATE OF text, user_id, entry_id ON core_comment BEGIN "
+    f"DELETE FROM core_journal_fts WHERE rowid = old.id * 2 + 1; {SQLITE_COMMENT_ROW} END",
+    "CREATE TRIGGER core_comment_fts_ad AFTER DELETE ON core_comment BEGIN "
+    "DELETE FROM core_journal_fts WHERE rowid = old.id * 2 + 1; END",
+
+    # backfill
+    "INSERT INTO core_journal_fts(rowid, owner, mood, body, kind, doc_id, entry_id) "
+    f"SELECT id * 2, 'u' || user_id, {_sqlite_clean('mood')}, {_sqlite_clean('review')}, 'e', id, id "
+    "FROM core_journalentry",
+    "INSERT INTO core_journal_fts(rowid, owner, mood, body, kind, doc_id, entry_id) "
+    f"SELECT id * 2 + 1, 'u' || user_id, '', {_sqlite_clean('text')}, 'c', id, entry_id "
+    "FROM core_comment",
+]
+
+SQLITE_BACKWARD = [
+    *[
+        f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}"
+        for table in ("core_journalentry", "core_comment")
+        for suffix in ("ai", "au", "ad")
+    ],
+    "DROP TABLE IF EXISTS core_journal_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            try:
+                with transaction.atomic(using=connection.alias):
+                    cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+                composite = True
+            except DatabaseError:
+                composite = False
+
+            for table, expression in PG_VECTORS.items():
+                # adding a stored generated column rewrites the table once
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({expression}) STORED"
+                )
+                columns = "user_id, search_vector" if composite else "search_vector"
+                cursor.execute(f"CREATE INDEX {PG_INDEXES[table]} ON {table} USING gin ({columns})")
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for statement in SQLITE_FORWARD:
+                cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for table, index in PG_INDEXES.items():
+                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+                cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for statement in SQLITE_BACKWARD:
+                cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_querystat'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_journal_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.IntegerField(unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('profile_path', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Credit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character', models.CharField(blank=True, max_length=255)),
+                ('order', models.PositiveSmallIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='core.movie')),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='core.person')),
+            ],
+            options={
+                'ordering': ['order'],
+                'indexes': [models.Index(fields=['movie', 'order'], name='credit_movie_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('person', 'movie'), name='credit_person_movie_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+
+def backfill_follower_count(apps, schema_editor):
+    Follow = apps.get_model("core", "Follow")
+    FollowerCount = apps.get_model("core", "FollowerCount")
+    db = schema_editor.connection.alias
+    counts = (
+        Follow.objects.using(db).order_by().values("followee").annotate(n=Count("id"))
+    )
+    FollowerCount.objects.using(db).bulk_create(
+        (FollowerCount(user_id=row["followee"], count=row["n"]) for row in counts.iterator()),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0012_person_credit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowerCount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follower_count', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_follower_count, migrations.RunPython.noop),
+    ]
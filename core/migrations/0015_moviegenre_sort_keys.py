@@ -0,0 +1,95 @@
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def backfill_sort_keys(apps, schema_editor):
+    """
+    Copy each movie's sort keys onto its genre links in primary-key ranges,
+    each in its own short transaction.
+    """
+    Movie = apps.get_model("core", "Movie")
+    MovieGenre = apps.get_model("core", "MovieGenre")
+    db = schema_editor.connection.alias
+    movie = Movie.objects.using(db).filter(pk=OuterRef("movie_id"))
+    last_pk = MovieGenre.objects.using(db).aggregate(models.Max("pk"))["pk__max"] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic(using=db):
+            MovieGenre.objects.using(db).filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(
+                popularity=Subquery(movie.values("popularity")[:1]),
+                release_date=Subquery(movie.values("release_date")[:1]),
+                title=Subquery(movie.values("title")[:1]),
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0014_sharedcounter'),
+    ]
+
+    operations = [
+        # the existing auto-created core_movie_genres table becomes MovieGenre
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='MovieGenre',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.genre')),
+                        ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.movie')),
+                    ],
+                    options={
+                        'db_table': 'core_movie_genres',
+                        'unique_together': {('movie', 'genre')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='movie',
+                    name='genres',
+                    field=models.ManyToManyField(blank=True, related_name='movies', through='core.MovieGenre', to='core.genre'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='moviegenre',
+            name='popularity',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviegenre',
+            name='release_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='moviegenre',
+            name='title',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='moviegenre',
+            index=models.Index(fields=['genre', '-popularity', 'movie'], name='moviegenre_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviegenre',
+            index=models.Index(fields=['genre', 'release_date', 'popularity'], name='moviegenre_release_pop_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviegenre',
+            index=models.Index(fields=['genre', 'title', 'movie'], name='moviegenre_title_idx'),
+        ),
+        # include the id tie-break, so PostgreSQL needn't sort equal titles
+        migrations.RemoveIndex(
+            model_name='movie',
+            name='movie_title_idx',
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['title', 'id'], name='movie_title_idx'),
+        ),
+    ]
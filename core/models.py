@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class JournalEntry(models.Model):
     STATUS_WATCHED = "watched"
@@ -20,10 +21,18 @@ class JournalEntry(models.Model):
     watched_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    comment_count = models.PositiveIntegerField(default=0)  # denormalized from comments
 
     class Meta:
         unique_together = ("user", "movie")
         ordering = ["-updated_at"]
+        indexes = [
+            # recent-activity windows scanned by compute_trending
+            models.Index(fields=["created_at"], name="journal_created_idx"),
+            models.Index(fields=["updated_at"], name="journal_updated_idx"),
+            # a user's journal, newest first (MyJournalView, journal API cursors)
+            models.Index(fields=["user", "-updated_at", "-id"], name="journal_user_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} — {self.movie.title} ({self.status})"
@@ -37,18 +46,231 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # keyset pagination of an entry's thread on (created_at, id)
+            models.Index(fields=["entry", "created_at", "id"], name="comment_entry_created_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.entry}"
 
+class Genre(models.Model):
+    tmdb_id = models.IntegerField(unique=True)
+    name = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class Movie(models.Model):
     tmdb_id = models.IntegerField(unique=True)
     title = models.CharField(max_length=255)
     overview = models.TextField(blank=True)
     poster_path = models.CharField(max_length=255, blank=True, null=True)
-    release_date = models.CharField(max_length=20, blank=True)
+    release_date = models.DateField(null=True, blank=True)
     popularity = models.FloatField(default=0)
+    genres = models.ManyToManyField(Genre, through="MovieGenre", related_name="movies", blank=True)
+
+    class Meta:
+        indexes = [
+            # home grid sorts; the trailing id keeps pagination order stable
+            models.Index(fields=["-popularity", "id"], name="movie_popularity_idx"),
+            models.Index(fields=["release_date", "popularity"], name="movie_release_pop_idx"),
+            models.Index(fields=["title", "id"], name="movie_title_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def year(self):
+        return self.release_date.year if self.release_date else None
+
+
+class MovieGenre(models.Model):
+    """
+    Movie.genres link. Carries copies of the movie's home grid sort keys
+    (kept in step by sync_movie_genres and the Movie post_save receiver), so
+    a genre filter with any sort reads one composite index in order.
+    """
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    popularity = models.FloatField(default=0)
+    release_date = models.DateField(null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        db_table = "core_movie_genres"
+        unique_together = ("movie", "genre")
+        indexes = [
+            models.Index(fields=["genre", "-popularity", "movie"], name="moviegenre_popularity_idx"),
+            models.Index(fields=["genre", "release_date", "popularity"], name="moviegenre_release_pop_idx"),
+            models.Index(fields=["genre", "title", "movie"], name="moviegenre_title_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.movie} in {self.genre}"
+
+    @staticmethod
+    def sort_keys(movie):
+        return {"popularity": movie.popularity or 0, "release_date": movie.release_date, "title": movie.title}
+
+
+class Person(models.Model):
+    tmdb_id = models.IntegerField(unique=True)
+    name = models.CharField(max_length=255)
+    profile_path = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Credit(models.Model):
+    """
+    A cast credit, stored from the TMDb details response when a movie's
+    detail page is first enriched.
+    """
+    person = models.ForeignKey(Person, related_name="credits", on_delete=models.CASCADE)
+    movie = models.ForeignKey(Movie, related_name="credits", on_delete=models.CASCADE)
+    character = models.CharField(max_length=255, blank=True)
+    order = models.PositiveSmallIntegerField(default=0)  # TMDb billing order
+
+    class Meta:
+        ordering = ["order"]
+        constraints = [
+            # the person page's filmography join starts from person_id
+            models.UniqueConstraint(fields=["person", "movie"], name="credit_person_movie_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["movie", "order"], name="credit_movie_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.person} in {self.movie}"
+
+
+class TrendingRank(models.Model):
+    """
+    Precomputed home grid order, rebuilt by `manage.py compute_trending`.
+    """
+    movie = models.OneToOneField(Movie, related_name="trending", on_delete=models.CASCADE)
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"#{self.rank} {self.movie}"
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="following", on_delete=models.CASCADE)
+    followee = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="followers", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("follower", "followee")
+        indexes = [
+            # fan-out reads a followee's followers
+            models.Index(fields=["followee", "follower"], name="follow_followee_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.follower} → {self.followee}"
+
+
+class FollowerCount(models.Model):
+    """
+    Denormalized follower count per user, kept by the Follow signal
+    receivers in core.signals; decides fan-out-on-write vs on-read.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, primary_key=True, related_name="follower_count", on_delete=models.CASCADE
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user}: {self.count} followers"
+
+
+class TimelineItem(models.Model):
+    """
+    One activity on one user's timeline. The actor's own copy (owner ==
+    actor) doubles as their outbox for fan-out-on-read.
+    """
+    VERB_STATUS = "status"
+    VERB_RATED = "rated"
+    VERB_REVIEWED = "reviewed"
+    VERB_CHOICES = [
+        (VERB_STATUS, "Status"),
+        (VERB_RATED, "Rated"),
+        (VERB_REVIEWED, "Reviewed"),
+    ]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="timeline_items", on_delete=models.CASCADE)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE)
+    movie = models.ForeignKey(Movie, related_name="+", on_delete=models.CASCADE)
+    verb = models.CharField(max_length=16, choices=VERB_CHOICES)
+    status = models.CharField(max_length=20, blank=True)
+    rating = models.PositiveSmallIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-id"], name="timeline_owner_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.actor} {self.verb} {self.movie} (for {self.owner})"
+
+
+class QueryStat(models.Model):
+    """
+    Sampled demand counter for one normalized search term or one movie
+    detail page; read by `manage.py warm_caches`.
+    """
+    KIND_SEARCH = "search"
+    KIND_MOVIE = "movie"
+    KIND_CHOICES = [
+        (KIND_SEARCH, "Search"),
+        (KIND_MOVIE, "Movie detail"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=255)  # normalized term, or tmdb_id
+    hits = models.PositiveBigIntegerField(default=0)  # estimated, scaled by the sample rate
+    last_seen = models.DateTimeField(default=timezone.now)
+    last_warmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="querystat_kind_key_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "-hits"], name="querystat_kind_hits_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} ({self.hits})"
+
+
+class SharedCounter(models.Model):
+    """
+    A counter that every process can bump atomically; used by core.counters
+    when the cache is a DatabaseCache, whose own incr() isn't atomic.
+    """
+    name = models.CharField(max_length=200, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    expires = models.FloatField(null=True, blank=True)  # unix time; null = never
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,74 @@
+"""
+Keyset ("seek") pagination helpers.
+
+Instead of OFFSET, each page is fetched with a WHERE clause on the sort
+key of the last row seen, so every page costs one index range scan no
+matter how deep the reader goes. Cursors are opaque url-safe strings.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Reverse of encode_cursor; raises ValueError on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def _row_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def _to_python(model, field, value):
+    try:
+        return model._meta.get_field(field).to_python(value)
+    except Exception:
+        return value
+
+
+def keyset_page(qs, fields, cursor=None, limit=20, descending=True):
+    """
+    Return (rows, next_cursor) for the page of `qs` after `cursor`, ordered
+    by `fields` (e.g. ("created_at", "id")). The last field must be unique.
+    `qs` may be a model or .values() queryset. Raises ValueError for a bad
+    cursor.
+    """
+    prefix = "-" if descending else ""
+    qs = qs.order_by(*[prefix + f for f in fields])
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError("invalid cursor")
+        values = [_to_python(qs.model, f, v) for f, v in zip(fields, values)]
+        op = "lt" if descending else "gt"
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y), generalised
+        condition = Q()
+        for i, field in enumerate(fields):
+            clause = Q(**{f"{field}__{op}": values[i]})
+            for prev_field, prev_value in zip(fields[:i], values[:i]):
+                clause &= Q(**{prev_field: prev_value})
+            condition |= clause
+        qs = qs.filter(condition)
+
+    rows = list(qs[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_row_value(rows[-1], f) for f in fields])
+    return rows, next_cursor
@@ -0,0 +1,80 @@
+"""
+Sampled log of what users ask for, aggregated into QueryStat counters.
+
+SearchView and MovieDetailView call log_search() / log_movie_view(). Only
+a QUERYLOG_SAMPLE_RATE fraction of calls is recorded, each one adding
+round(1 / rate) hits, and the counter update runs in the background, so
+the request pays for one random() call. `manage.py warm_caches` reads the
+busiest rows (see top_queries()) to refresh their TMDb responses before
+they expire.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .background import run_in_background
+from .models import QueryStat
+
+
+def normalize_search(query):
+    """
+    Case-fold and collapse whitespace; TMDb search ignores both, so this is
+    also the form SearchView sends upstream (one cache entry per term).
+    """
+    return " ".join((query or "").casefold().split())[:255]
+
+
+def _bump(kind, key, weight, seen_at):
+    updated = QueryStat.objects.filter(kind=kind, key=key).update(
+        hits=F("hits") + weight, last_seen=seen_at
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            QueryStat.objects.create(kind=kind, key=key, hits=weight, last_seen=seen_at)
+    except IntegrityError:
+        # another worker created the row first
+        QueryStat.objects.filter(kind=kind, key=key).update(
+            hits=F("hits") + weight, last_seen=seen_at
+        )
+
+
+def log_query(kind, key):
+    rate = settings.QUERYLOG_SAMPLE_RATE
+    if not key or rate <= 0 or random.random() >= rate:
+        return
+    run_in_background(_bump, kind, str(key), max(round(1 / rate), 1), timezone.now())
+
+
+def log_search(query):
+    log_query(QueryStat.KIND_SEARCH, normalize_search(query))
+
+
+def log_movie_view(tmdb_id):
+    log_query(QueryStat.KIND_MOVIE, tmdb_id)
+
+
+def top_queries(kind, limit):
+    """
+    The `limit` most requested keys of `kind` seen within QUERYLOG_WINDOW_DAYS.
+    """
+    since = timezone.now() - timedelta(days=settings.QUERYLOG_WINDOW_DAYS)
+    return list(
+        QueryStat.objects.filter(kind=kind, last_seen__gte=since)
+        .order_by("-hits", "key")
+        .values_list("key", flat=True)[:limit]
+    )
+
+
+def prune_queries():
+    """
+    Drop counters not seen within QUERYLOG_WINDOW_DAYS; returns how many.
+    """
+    since = timezone.now() - timedelta(days=settings.QUERYLOG_WINDOW_DAYS)
+    deleted, _ = QueryStat.objects.filter(last_seen__lt=since).delete()
+    return deleted
@@ -0,0 +1,173 @@
+"""
+Cluster-wide limiter for outbound TMDb calls.
+
+Every process (gunicorn workers, management commands, background jobs)
+counts its calls in one-second buckets kept by core/counters.py, so the
+budget of TMDB_RATE_LIMIT requests per second holds across the whole
+deployment as long as those counters are shared (Redis or CACHE_TABLE; with
+the default per-process cache each worker gets the full budget).
+Callers take a token in a lane:
+
+* INTERACTIVE (a user is waiting) may use the whole bucket;
+* BACKGROUND (refresh_movies, enrichment, crawls) only gets a token while
+  the bucket is below TMDB_BACKGROUND_SHARE of it, so a crawl always leaves
+  headroom for interactive requests.
+
+When TMDb answers 429, throttled() stops every lane until Retry-After has
+passed and halves the rate; the rate then climbs back linearly to
+TMDB_RATE_LIMIT over TMDB_RATE_RECOVERY seconds. Per-lane counters and
+last-minute utilization are reported by lane_stats().
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+BUCKET_KEY = "tmdb:rl:bucket"
+BLOCKED_KEY = "tmdb:rl:blocked_until"
+ADAPTED_KEY = "tmdb:rl:adapted"
+USAGE_SECONDS = 60
+
+
+class RateLimited(Exception):
+    """
+    No token became available within the lane's maximum wait.
+    """
+
+
+def _max_wait(lane):
+    if lane == INTERACTIVE:
+        return settings.TMDB_INTERACTIVE_MAX_WAIT
+    return settings.TMDB_BACKGROUND_MAX_WAIT
+
+
+def current_rate(now=None):
+    """
+    Requests per second currently allowed, after any 429 back-off.
+    """
+    ceiling = settings.TMDB_RATE_LIMIT
+    adapted = cache.get(ADAPTED_KEY)
+    if adapted is None:
+        return ceiling
+    rate, since = adapted
+    elapsed = max((now or time.time()) - since, 0)
+    return min(ceiling, rate + elapsed * ceiling / settings.TMDB_RATE_RECOVERY)
+
+
+def acquire(lane=INTERACTIVE):
+    """
+    Block until `lane` may send one request; returns the seconds waited.
+    Raises RateLimited if that would take longer than the lane's max wait.
+    """
+    if lane not in LANES:
+        raise ValueError(f"unknown lane {lane!r}")
+    share = 1.0 if lane == INTERACTIVE else settings.TMDB_BACKGROUND_SHARE
+    started = time.monotonic()
+    deadline = started + _max_wait(lane)
+
+    while True:
+        now = time.time()
+        blocked_until = cache.get(BLOCKED_KEY, 0)
+        if blocked_until > now:
+            pause = blocked_until - now
+        else:
+            second = int(now)
+            key = f"{BUCKET_KEY}:{second}"
+            capacity = max(1, int(current_rate(now) * share))
+            # background peeks first so that refusals don't eat interactive tokens
+            if lane == INTERACTIVE or counters.get(key) < capacity:
+                if counters.incr(key, timeout=5) <= capacity:
+                    waited = time.monotonic() - started
+                    _record_grant(lane, second, waited)
+                    return waited
+            pause = second + 1 - now
+
+        if time.monotonic() + pause > deadline:
+            counters.incr(f"tmdb:rl:denied:{lane}")
+            raise RateLimited(f"no TMDb {lane} token within {_max_wait(lane)}s")
+        time.sleep(pause + random.uniform(0, 0.02))
+
+
+def _record_grant(lane, second, waited):
+    counters.incr(f"tmdb:rl:used:{lane}:{second}", timeout=USAGE_SECONDS + 5)
+    counters.incr(f"tmdb:rl:granted:{lane}")
+    if waited:
+        counters.incr(f"tmdb:rl:wait_ms:{lane}", int(waited * 1000))
+
+
+def parse_retry_after(value, default=1.0):
+    """
+    Seconds from a Retry-After header (delta-seconds or HTTP date).
+    """
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+def throttled(retry_after):
+    """
+    TMDb answered 429: pause all lanes for `retry_after` seconds and halve
+    the rate. Repeated 429s within a second (from other workers hitting the
+    same wall) only halve it once.
+    """
+    now = time.time()
+    resume_at = now + retry_after
+    if cache.get(BLOCKED_KEY, 0) < resume_at:
+        cache.set(BLOCKED_KEY, resume_at, timeout=math.ceil(retry_after) + 1)
+
+    adapted = cache.get(ADAPTED_KEY)
+    if adapted is None or now - adapted[1] >= 1:
+        rate = max(current_rate(now) / 2, 1.0)
+        timeout = math.ceil(retry_after + settings.TMDB_RATE_RECOVERY) + 1
+        cache.set(ADAPTED_KEY, (rate, resume_at), timeout=timeout)
+    counters.incr("tmdb:rl:throttled")
+
+
+def lane_stats():
+    """
+    Counters per lane plus utilization: the share of the current rate's
+    budget each lane used over the last USAGE_SECONDS seconds.
+    """
+    now = int(time.time())
+    seconds = range(now - USAGE_SECONDS, now)
+    rate = current_rate()
+    keys = ["tmdb:rl:throttled"]
+    for lane in LANES:
+        keys += [f"tmdb:rl:{name}:{lane}" for name in ("granted", "denied", "wait_ms")]
+        keys += [f"tmdb:rl:used:{lane}:{s}" for s in seconds]
+    values = counters.get_many(keys)
+
+    lanes = {}
+    for lane in LANES:
+        granted = values.get(f"tmdb:rl:granted:{lane}", 0)
+        recent = sum(values.get(f"tmdb:rl:used:{lane}:{s}", 0) for s in seconds)
+        lanes[lane] = {
+            "granted": granted,
+            "denied": values.get(f"tmdb:rl:denied:{lane}", 0),
+            "avg_wait_ms": values.get(f"tmdb:rl:wait_ms:{lane}", 0) / granted if granted else 0.0,
+            "last_minute": recent,
+            "utilization": recent / (rate * USAGE_SECONDS),
+        }
+    return {
+        "rate": rate,
+        "rate_limit": settings.TMDB_RATE_LIMIT,
+        "blocked_for": max(cache.get(BLOCKED_KEY, 0) - time.time(), 0.0),
+        "throttled": values.get("tmdb:rl:throttled", 0),
+        "lanes": lanes,
+    }
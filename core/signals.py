@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Follow, Movie, MovieGenre
+from .suggest import index_movie, unindex_movie
+from .timeline import adjust_follower_count
+
+
+@receiver(post_save, sender=Movie)
+def movie_saved(sender, instance, created, **kwargs):
+    index_movie(instance)
+    if not created:
+        # genre links carry copies of the sort keys; only touch stale ones
+        keys = MovieGenre.sort_keys(instance)
+        MovieGenre.objects.filter(movie=instance).exclude(**keys).update(**keys)
+
+
+@receiver(post_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    unindex_movie(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        adjust_follower_count(instance.followee_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    adjust_follower_count(instance.followee_id, -1)
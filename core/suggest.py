@@ -0,0 +1,359 @@
+"""
+In-process prefix index over Movie.title for search-as-you-type.
+
+Every indexed movie gets a slot; per-slot data lives in parallel arrays
+(tmdb_id, popularity) plus a list of display titles. Each normalized token
+maps to a posting list (array of slot numbers) kept sorted by popularity,
+so the top N for a prefix is a lazy merge over the matching postings.
+
+Prefixes of up to SHORT_PREFIX_LEN characters match thousands of tokens,
+so for those the index also keeps a precomputed popularity-ordered list
+of the top SHORT_PREFIX_TOP slots, and a one-letter query reads that list
+instead of merging every matching posting list.
+
+The index is built in the background (core.background), never inside a
+request; until the first build finishes, suggestions are empty. Saves in
+this process are applied by the Movie post_save receiver in core.signals.
+Changes made elsewhere (refresh_movies, other workers) are picked up by a
+background rebuild when the catalog version (core.hotset) changes or the
+index is older than SUGGEST_INDEX_MAX_AGE seconds; the old index keeps
+serving until the new one is swapped in. The index holds at most
+SUGGEST_INDEX_MAX_TITLES movies (the most popular ones at build time);
+titles ingested once it is full are picked up on the next rebuild.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from .background import run_in_background
+from .hotset import catalog_version
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+SHORT_PREFIX_LEN = 2
+SHORT_PREFIX_TOP = 100
+VERSION_CHECK_INTERVAL = 1.0
+
+
+def normalize(text):
+    """
+    Case-fold and accent-fold text: "Amélie" -> "amelie".
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _short_prefixes(tokens):
+    return {t[:n] for t in tokens for n in range(1, SHORT_PREFIX_LEN + 1) if len(t) >= n}
+
+
+class SuggestIndex:
+    def __init__(self, max_titles=None, version=None):
+        self.max_titles = max_titles or settings.SUGGEST_INDEX_MAX_TITLES
+        self.version = version
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._tmdb_ids = array("q")
+        self._popularity = array("d")
+        self._titles = []
+        self._slot_by_tmdb_id = {}
+        self._free_slots = []
+        self._tokens = []       # sorted unique tokens
+        self._postings = {}     # token -> array("I") of slots, most popular first
+        self._short_top = {}    # short prefix -> array("I") of its top slots, most popular first
+        self._short_dirty = set()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._slot_by_tmdb_id)
+
+    # ---- building / updating ----
+
+    def build(self, rows):
+        """
+        Replace the index contents with rows of (tmdb_id, title, popularity).
+        Rows are expected most-popular first; anything past max_titles is dropped.
+        """
+        with self._lock:
+            self._clear()
+            postings = {}
+            short_top = {}
+            for tmdb_id, title, popularity in rows:
+                if len(self._titles) >= self.max_titles:
+                    self.dropped += 1
+                    continue
+                slot = self._new_slot(tmdb_id, title, popularity)
+                tokens = set(tokenize(title))
+                for token in tokens:
+                    postings.setdefault(token, array("I")).append(slot)
+                # rows arrive most popular first, so the first N per prefix are its top N
+                for prefix in _short_prefixes(tokens):
+                    top = short_top.setdefault(prefix, array("I"))
+                    if len(top) < SHORT_PREFIX_TOP:
+                        top.append(slot)
+
+            pop = self._popularity
+            for token, slots in postings.items():
+                postings[token] = array("I", sorted(slots, key=lambda s: -pop[s]))
+            for prefix, slots in short_top.items():
+                short_top[prefix] = array("I", sorted(slots, key=lambda s: -pop[s]))
+            self._postings = postings
+            self._tokens = sorted(postings)
+            self._short_top = short_top
+
+    def add(self, tmdb_id, title, popularity):
+        """
+        Insert or update a single movie. Returns False if the index is full.
+        """
+        with self._lock:
+            slot = self._slot_by_tmdb_id.get(tmdb_id)
+            if slot is not None:
+                if self._titles[slot] == title and self._popularity[slot] == popularity:
+                    return True
+                self._unlink(slot)
+                self._titles[slot] = title
+                self._popularity[slot] = popularity
+            elif len(self._slot_by_tmdb_id) >= self.max_titles:
+                self.dropped += 1
+                return False
+            else:
+                slot = self._new_slot(tmdb_id, title, popularity)
+            self._link(slot)
+            return True
+
+    def remove(self, tmdb_id):
+        with self._lock:
+            slot = self._slot_by_tmdb_id.pop(tmdb_id, None)
+            if slot is None:
+                return
+            self._unlink(slot)
+            self._titles[slot] = ""
+            self._free_slots.append(slot)
+
+    def _new_slot(self, tmdb_id, title, popularity):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._tmdb_ids[slot] = tmdb_id
+            self._popularity[slot] = popularity
+            self._titles[slot] = title
+        else:
+            slot = len(self._titles)
+            self._tmdb_ids.append(tmdb_id)
+            self._popularity.append(popularity)
+            self._titles.append(title)
+        self._slot_by_tmdb_id[tmdb_id] = slot
+        return slot
+
+    def _rank_key(self, slot):
+        return -self._popularity[slot]
+
+    def _link(self, slot):
+        tokens = set(tokenize(self._titles[slot]))
+        for token in tokens:
+            slots = self._postings.get(token)
+            if slots is None:
+                self._postings[token] = array("I", [slot])
+                insort(self._tokens, token)
+            else:
+                pos = bisect_left(slots, self._rank_key(slot), key=self._rank_key)
+                slots.insert(pos, slot)
+
+        for prefix in _short_prefixes(tokens):
+            top = self._short_top.setdefault(prefix, array("I"))
+            pos = bisect_left(top, self._rank_key(slot), key=self._rank_key)
+            if pos < SHORT_PREFIX_TOP:
+                top.insert(pos, slot)
+                del top[SHORT_PREFIX_TOP:]
+
+    def _unlink(self, slot):
+        tokens = set(tokenize(self._titles[slot]))
+        for prefix in _short_prefixes(tokens):
+            top = self._short_top.get(prefix)
+            if top is not None and slot in top:
+                top.remove(slot)
+                # the next-best slot isn't known; recompute on the next query
+                self._short_dirty.add(prefix)
+
+        for token in tokens:
+            slots = self._postings.get(token)
+            if slots is None:
+                continue
+            try:
+                slots.remove(slot)
+            except ValueError:
+                continue
+            if not slots:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    # ---- querying ----
+
+    def _prefix_postings(self, prefix):
+        start = bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield self._postings[token]
+
+    def _merged_prefix(self, prefix):
+        pop = self._popularity
+        return heapq.merge(*self._prefix_postings(prefix), key=lambda s: -pop[s])
+
+    def _short_prefix_top(self, prefix):
+        """
+        Top SHORT_PREFIX_TOP slots for a short prefix; caller holds the lock.
+        """
+        if prefix in self._short_dirty:
+            self._short_dirty.discard(prefix)
+            top = array("I")
+            seen = set()
+            for slot in self._merged_prefix(prefix):
+                if slot not in seen:
+                    seen.add(slot)
+                    top.append(slot)
+                    if len(top) >= SHORT_PREFIX_TOP:
+                        break
+            self._short_top[prefix] = top
+        return self._short_top.get(prefix, ())
+
+    def search(self, query, limit=10):
+        """
+        Return up to `limit` dicts {tmdb_id, title}, most popular first.
+        Every query token but the last must match a whole title token;
+        the last one matches as a prefix.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        *whole, prefix = terms
+
+        with self._lock:
+            if whole:
+                # drive the scan from the rarest whole-word posting list
+                lists = [self._postings.get(t) for t in whole]
+                if not all(lists):
+                    return []
+                candidates = min(lists, key=len)
+            elif len(prefix) <= SHORT_PREFIX_LEN and limit <= SHORT_PREFIX_TOP:
+                candidates = self._short_prefix_top(prefix)
+            else:
+                candidates = self._merged_prefix(prefix)
+
+            results = []
+            seen = set()
+            for slot in candidates:
+                if slot in seen:
+                    continue
+                seen.add(slot)
+                title = self._titles[slot]
+                if whole:
+                    title_tokens = tokenize(title)
+                    if not all(t in title_tokens for t in whole):
+                        continue
+                    if not any(t.startswith(prefix) for t in title_tokens):
+                        continue
+                results.append({"tmdb_id": self._tmdb_ids[slot], "title": title})
+                if len(results) >= limit:
+                    break
+            return results
+
+
+_index = None
+_checked_at = 0.0
+_state_lock = threading.Lock()
+_rebuilding = False
+_pending = []           # (tmdb_id, title, popularity) or (tmdb_id, None, None) saved mid-rebuild
+_EMPTY = SuggestIndex(max_titles=1)
+
+
+def _build_index():
+    global _index, _rebuilding
+    from .models import Movie
+
+    try:
+        index = SuggestIndex(version=catalog_version())
+        rows = (
+            Movie.objects.order_by("-popularity")
+            .values_list("tmdb_id", "title", "popularity")[: index.max_titles]
+        )
+        index.build(rows.iterator(chunk_size=5000))
+    except BaseException:
+        with _state_lock:
+            _rebuilding = False
+            _pending.clear()
+        raise
+    with _state_lock:
+        # saves in this process while the build was reading
+        for tmdb_id, title, popularity in _pending:
+            if title is None:
+                index.remove(tmdb_id)
+            else:
+                index.add(tmdb_id, title, popularity)
+        _pending.clear()
+        _index = index
+        _rebuilding = False
+
+
+def _schedule_rebuild():
+    global _rebuilding
+    with _state_lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    run_in_background(_build_index)
+
+
+def get_suggest_index():
+    """
+    Return the process-wide index, scheduling a background rebuild when it
+    is missing, older than SUGGEST_INDEX_MAX_AGE or behind the catalog
+    version. Until the first build completes, returns an empty index.
+    """
+    global _checked_at
+    index = _index
+    if index is None:
+        _schedule_rebuild()
+        return _index or _EMPTY
+
+    now = time.monotonic()
+    if now - _checked_at >= VERSION_CHECK_INTERVAL:
+        _checked_at = now
+        if now - index.built_at > settings.SUGGEST_INDEX_MAX_AGE or catalog_version() != index.version:
+            _schedule_rebuild()
+    return _index
+
+
+def index_movie(movie):
+    """
+    Keep an already-built index in sync with a movie saved in this process.
+    Does nothing if the index hasn't been built yet in this process.
+    """
+    with _state_lock:
+        if _rebuilding:
+            _pending.append((movie.tmdb_id, movie.title, movie.popularity or 0))
+        index = _index
+    if index is not None:
+        index.add(movie.tmdb_id, movie.title, movie.popularity or 0)
+
+
+def unindex_movie(movie):
+    with _state_lock:
+        if _rebuilding:
+            _pending.append((movie.tmdb_id, None, None))
+        index = _index
+    if index is not None:
+        index.remove(movie.tmdb_id)
@@ -1,3 +1,97 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .suggest import SHORT_PREFIX_LEN, SHORT_PREFIX_TOP, SuggestIndex, tokenize
+
+WORDS = [
+    "the", "then", "theory", "there", "a", "an", "and", "amelie", "Amélie", "alien", "aliens",
+    "star", "stars", "start", "wars", "war", "way", "night", "nights", "no", "north", "b",
+    "ba", "bad", "badlands", "big", "blue", "blade", "runner", "run", "rust", "x",
+]
+
+
+class SuggestIndexEquivalenceTests(SimpleTestCase):
+    """
+    Random add/update/remove/search sequences against a brute-force scan of
+    the same movies. The small vocabulary puts far more than SHORT_PREFIX_TOP
+    titles under most short prefixes, so updates and removals keep pushing
+    slots in and out of the precomputed top lists and dirtying them.
+    """
+
+    OPS = 4000
+    MAX_TITLES = 400
+
+    def _title(self, rng):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+    def _query(self, rng, movies):
+        if movies and rng.random() < 0.5:
+            # a real title, cut anywhere, so multi-word queries match too
+            title = rng.choice(list(movies.values()))[0]
+            return title[: rng.randint(1, len(title))]
+        word = rng.choice(WORDS)
+        return word[: rng.randint(1, min(len(word), SHORT_PREFIX_LEN + 1))]
+
+    def _expected(self, movies, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        *whole, prefix = terms
+        hits = []
+        for tmdb_id, (title, popularity) in movies.items():
+            tokens = tokenize(title)
+            if all(t in tokens for t in whole) and any(t.startswith(prefix) for t in tokens):
+                hits.append((-popularity, tmdb_id, title))
+        hits.sort()
+        return [{"tmdb_id": tmdb_id, "title": title} for _, tmdb_id, title in hits[:limit]]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(20261019)
+        # distinct popularities, so "most popular first" is a total order
+        popularities = rng.sample(range(1, 1_000_000), self.OPS * 2)
+
+        movies = {}
+        for tmdb_id in range(1, 301):
+            movies[tmdb_id] = (self._title(rng), popularities.pop())
+        index = SuggestIndex(max_titles=self.MAX_TITLES)
+        rows = sorted(movies.items(), key=lambda item: -item[1][1])
+        index.build((tmdb_id, title, pop) for tmdb_id, (title, pop) in rows)
+
+        searched_short = 0
+        for step in range(self.OPS):
+            op = rng.random()
+            if op < 0.25:
+                tmdb_id = rng.randint(1, 600)
+                title = movies[tmdb_id][0] if tmdb_id in movies and rng.random() < 0.5 else self._title(rng)
+                popularity = popularities.pop()
+                accepted = index.add(tmdb_id, title, popularity)
+                self.assertEqual(accepted, tmdb_id in movies or len(movies) < self.MAX_TITLES)
+                if accepted:
+                    movies[tmdb_id] = (title, popularity)
+            elif op < 0.45:
+                tmdb_id = rng.randint(1, 600)
+                index.remove(tmdb_id)
+                movies.pop(tmdb_id, None)
+            else:
+                query = self._query(rng, movies)
+                limit = rng.choice([1, 5, 10, SHORT_PREFIX_TOP])
+                terms = tokenize(query)
+                if len(terms) == 1 and len(terms[0]) <= SHORT_PREFIX_LEN:
+                    searched_short += 1
+                self.assertEqual(
+                    index.search(query, limit=limit),
+                    self._expected(movies, query, limit),
+                    f"step {step}: search({query!r}, limit={limit})",
+                )
+            self.assertEqual(len(index), len(movies))
+
+        self.assertGreater(searched_short, 500)
+        # every short prefix, including ones whose top list was dirtied last
+        prefixes = {t[:n] for title, _ in movies.values() for t in tokenize(title) for n in (1, 2)}
+        for prefix in sorted(prefixes):
+            self.assertEqual(
+                index.search(prefix, limit=SHORT_PREFIX_TOP),
+                self._expected(movies, prefix, SHORT_PREFIX_TOP),
+                prefix,
+            )
@@ -0,0 +1,150 @@
+"""
+Activity timelines: fan-out-on-write with a fan-out-on-read escape hatch.
+
+When a user rates, changes status or reviews, publish_activity() schedules
+a background job that writes the item to the actor's own outbox and bulk
+inserts a copy into every follower's timeline. Actors with more than
+FANOUT_MAX_FOLLOWERS followers skip the copy; their followers pick those
+items up from the outbox at read time (see timeline_page()). Follower
+counts are kept in FollowerCount by the Follow signal receivers, so
+neither path counts the follow graph. Every timeline a fan-out writes to,
+the actor's own outbox included, is trimmed back to TIMELINE_MAX_ITEMS now
+and then.
+"""
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .background import run_in_background
+from .models import Follow, FollowerCount, TimelineItem
+from .pagination import keyset_page
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def adjust_follower_count(user_id, delta):
+    counts = FollowerCount.objects.filter(user_id=user_id)
+    if delta < 0:
+        counts = counts.filter(count__gte=-delta)
+    updated = counts.update(count=F("count") + delta)
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            FollowerCount.objects.create(user_id=user_id, count=delta)
+    except IntegrityError:
+        # another request created the row first
+        FollowerCount.objects.filter(user_id=user_id).update(count=F("count") + delta)
+
+
+def follower_count(user_id):
+    return (
+        FollowerCount.objects.filter(user_id=user_id).values_list("count", flat=True).first() or 0
+    )
+
+
+def is_hot(user_id):
+    """
+    True if user_id has too many followers to fan out to.
+    """
+    return follower_count(user_id) > settings.FANOUT_MAX_FOLLOWERS
+
+
+def trim_timelines(owner_ids):
+    """
+    Delete everything past the newest TIMELINE_MAX_ITEMS for each owner.
+    """
+    overflow = (
+        TimelineItem.objects.filter(owner_id__in=owner_ids)
+        .annotate(row=Window(
+            RowNumber(),
+            partition_by=F("owner_id"),
+            order_by=[F("created_at").desc(), F("id").desc()],
+        ))
+        .filter(row__gt=settings.TIMELINE_MAX_ITEMS)
+        .values_list("id", flat=True)
+    )
+    ids = list(overflow)
+    if ids:
+        TimelineItem.objects.filter(pk__in=ids).delete()
+
+
+def _maybe_trim(owner_ids):
+    if random.random() < settings.TIMELINE_TRIM_RATE:
+        trim_timelines(owner_ids)
+
+
+def fan_out(actor_id, movie_id, verb, status="", rating=None, created_at=None):
+    fields = {
+        "actor_id": actor_id,
+        "movie_id": movie_id,
+        "verb": verb,
+        "status": status or "",
+        "rating": rating,
+        "created_at": created_at or timezone.now(),
+    }
+    TimelineItem.objects.create(owner_id=actor_id, **fields)
+    _maybe_trim([actor_id])
+
+    if is_hot(actor_id):
+        return  # followers read this actor's outbox instead
+
+    followers = Follow.objects.filter(followee_id=actor_id)
+
+    batch = []
+    for follower_id in followers.values_list("follower_id", flat=True).iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _write_batch(batch, fields)
+            batch = []
+    if batch:
+        _write_batch(batch, fields)
+
+
+def _write_batch(owner_ids, fields):
+    TimelineItem.objects.bulk_create(
+        [TimelineItem(owner_id=owner_id, **fields) for owner_id in owner_ids]
+    )
+    _maybe_trim(owner_ids)
+
+
+def publish_activity(entry, verb):
+    """
+    Queue a fan-out of a JournalEntry change to the owner's followers.
+    """
+    run_in_background(
+        fan_out,
+        entry.user_id,
+        entry.movie_id,
+        verb,
+        status=entry.status,
+        rating=entry.rating,
+        created_at=timezone.now(),
+    )
+
+
+def timeline_page(user, cursor=None, limit=20):
+    """
+    One keyset page of `user`'s timeline: their materialized items plus the
+    outboxes of any hot accounts they follow, newest first.
+    Raises ValueError for a malformed cursor.
+    """
+    hot_followees = list(
+        Follow.objects.filter(
+            follower=user, followee__follower_count__count__gt=settings.FANOUT_MAX_FOLLOWERS
+        ).values_list("followee_id", flat=True)
+    )
+
+    condition = Q(owner=user)
+    if hot_followees:
+        # items fanned out before an actor became hot would show up twice
+        condition = (Q(owner=user) & ~Q(actor_id__in=hot_followees)) | Q(
+            owner_id__in=hot_followees, actor_id=F("owner_id")
+        )
+
+    qs = TimelineItem.objects.filter(condition).select_related("actor", "movie")
+    return keyset_page(qs, ("created_at", "id"), cursor=cursor, limit=limit)
@@ -0,0 +1,415 @@
+"""
+TMDb fetch path shared by the views and management commands.
+
+Responses are cached (TMDB_CACHE_TTL fresh, then TMDB_CACHE_STALE_TTL stale)
+and identical concurrent fetches are coalesced:
+
+* inside a process, callers asking for the same URL+params while a fetch is
+  in flight wait on the leader's Future instead of calling TMDb;
+* across gunicorn workers, a short cache lock lets one worker fetch while the
+  others serve the stale copy or poll briefly for the leader's result.
+
+Every HTTP request goes through tmdb_get(), which takes a token from the
+cluster-wide limiter in core/ratelimit.py; callers say which lane they are
+in (INTERACTIVE by default, BACKGROUND for commands and enrichment jobs).
+
+`manage.py warm_caches` re-fetches popular requests via warm_tmdb_data()
+shortly before they expire; hits on those entries count as "warm_hits".
+
+Counters for both paths are kept by core/counters.py (see tmdb_stats());
+they only add up across processes when that module's store is shared.
+"""
+import datetime
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters
+from .models import Credit, Genre, Movie, MovieGenre, Person
+from .ratelimit import BACKGROUND, INTERACTIVE, RateLimited, acquire, parse_retry_after, throttled
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+
+METRIC_NAMES = (
+    "requests",           # calls to fetch_tmdb_data
+    "cache_hits",         # served fresh from cache
+    "warm_hits",          # ... from an entry written by warm_caches
+    "upstream_calls",     # HTTP requests actually sent to TMDb
+    "upstream_errors",
+    "coalesced_local",    # waited on an in-process in-flight fetch
+    "coalesced_remote",   # waited for another worker's fetch
+    "served_stale",       # another worker was fetching; served stale copy
+    "rate_limited",       # gave up waiting for a rate-limit token
+)
+
+
+def _metric_key(name):
+    return f"tmdb:metrics:{name}"
+
+
+def record(name, amount=1):
+    counters.incr(_metric_key(name), amount)
+
+
+def tmdb_stats():
+    values = counters.get_many([_metric_key(n) for n in METRIC_NAMES])
+    stats = {n: values.get(_metric_key(n), 0) for n in METRIC_NAMES}
+    stats["coalesced"] = (
+        stats["coalesced_local"] + stats["coalesced_remote"] + stats["served_stale"]
+    )
+    stats["warm_hit_ratio"] = (
+        round(stats["warm_hits"] / stats["requests"], 3) if stats["requests"] else 0.0
+    )
+    return stats
+
+
+class SingleFlight:
+    """
+    Run fn once per key at a time; concurrent callers share the result.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            record("coalesced_local")
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+_flight = SingleFlight()
+
+
+def request_key(url, params=None):
+    """
+    Stable cache key for a TMDb request (the api_key is left out).
+    """
+    params = {k: v for k, v in (params or {}).items() if k != "api_key"}
+    raw = json.dumps([url, sorted(params.items())], default=str)
+    return "tmdb:resp:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def parse_release_date(value):
+    """
+    TMDb sends "YYYY-MM-DD", "" or None; return a date or None.
+    """
+    try:
+        return datetime.date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def movie_defaults(data, fallback=None):
+    """
+    Map a TMDb movie dict onto Movie fields. Coerces None -> "" for fields
+    that must not be NULL in DB; `fallback` (a Movie) fills any gaps.
+    """
+    return {
+        "title": data.get("title") or data.get("name") or (fallback and fallback.title) or "",
+        "overview": data.get("overview") or (fallback and fallback.overview) or "",
+        "poster_path": data.get("poster_path") or (fallback and fallback.poster_path) or "",
+        "release_date": parse_release_date(data.get("release_date")) or (fallback and fallback.release_date) or None,
+        "popularity": data.get("popularity") or (fallback and fallback.popularity) or 0,
+    }
+
+
+def store_genres(genres):
+    """
+    Upsert TMDb [{"id": .., "name": ..}] genre dicts; returns {tmdb_id: pk}.
+    """
+    genres = [g for g in genres or [] if g.get("id") and g.get("name")]
+    if genres:
+        Genre.objects.bulk_create(
+            [Genre(tmdb_id=g["id"], name=g["name"]) for g in genres],
+            update_conflicts=True,
+            unique_fields=["tmdb_id"],
+            update_fields=["name"],
+        )
+    return dict(Genre.objects.values_list("tmdb_id", "pk"))
+
+
+def sync_movie_genres(movie, data, genre_map=None):
+    """
+    Set movie.genres from a TMDb payload: details responses carry "genres"
+    (id + name), list/search results only "genre_ids".
+    """
+    if data.get("genres"):
+        genre_map = store_genres(data["genres"])
+        ids = [g.get("id") for g in data["genres"]]
+    elif "genre_ids" in data:
+        if genre_map is None:
+            genre_map = dict(Genre.objects.values_list("tmdb_id", "pk"))
+        ids = data["genre_ids"] or []
+    else:
+        return
+    movie.genres.set(
+        [genre_map[i] for i in ids if i in genre_map],
+        through_defaults=MovieGenre.sort_keys(movie),
+    )
+
+
+def store_credits(movie, data):
+    """
+    Upsert the people in a details payload's credits.cast and link them to
+    `movie`, in three queries however long the cast is.
+    """
+    cast = [
+        m for m in ((data.get("credits") or {}).get("cast") or [])
+        if m.get("id") and m.get("name")
+    ]
+    if not cast:
+        return
+    Person.objects.bulk_create(
+        [Person(tmdb_id=m["id"], name=m["name"][:255], profile_path=m.get("profile_path") or "") for m in cast],
+        update_conflicts=True,
+        unique_fields=["tmdb_id"],
+        update_fields=["name", "profile_path"],
+    )
+    person_ids = dict(
+        Person.objects.filter(tmdb_id__in=[m["id"] for m in cast]).values_list("tmdb_id", "pk")
+    )
+    credits = {}
+    for position, m in enumerate(cast):
+        person_id = person_ids.get(m["id"])
+        if person_id and person_id not in credits:  # one credit per person, first billing wins
+            credits[person_id] = Credit(
+                person_id=person_id,
+                movie=movie,
+                character=(m.get("character") or "")[:255],
+                order=min(m["order"] if isinstance(m.get("order"), int) else position, 32767),
+            )
+    Credit.objects.bulk_create(
+        credits.values(),
+        update_conflicts=True,
+        unique_fields=["person", "movie"],
+        update_fields=["character", "order"],
+    )
+
+
+def upsert_movie(data, fallback=None, genre_map=None):
+    """
+    Create or update the Movie (and its genres) described by a TMDb dict.
+    """
+    movie, _ = Movie.objects.update_or_create(
+        tmdb_id=data.get("id"), defaults=movie_defaults(data, fallback=fallback)
+    )
+    sync_movie_genres(movie, data, genre_map=genre_map)
+    return movie
+
+
+def _ingest_results(data):
+    # If this is a search/multi-page response with "results"
+    if isinstance(data, dict) and "results" in data and isinstance(data["results"], list):
+        genre_map = dict(Genre.objects.values_list("tmdb_id", "pk"))
+        for movie in data["results"]:
+            tmdb_id = movie.get("id")
+            try:
+                upsert_movie(movie, genre_map=genre_map)
+            except Exception as e:
+                # log and continue
+                print(f"Skipping movie id={tmdb_id} due to DB error: {e}")
+
+
+def tmdb_get(url, params=None, lane=INTERACTIVE, timeout=6):
+    """
+    One rate-limited GET to TMDb. A 429 backs the whole cluster off (see
+    ratelimit.throttled) before raise_for_status() raises it. Raises
+    RateLimited if no token is available within the lane's wait budget.
+    """
+    import requests  # deferred: keeps requests off the cold-start import path
+
+    acquire(lane)
+    record("upstream_calls")
+    response = requests.get(url, params=params, timeout=timeout)
+    if response.status_code == 429:
+        throttled(parse_retry_after(response.headers.get("Retry-After")))
+    response.raise_for_status()
+    return response
+
+
+def _fetch_upstream(url, params, retries, delay, lane):
+    import requests
+
+    for attempt in range(retries):
+        try:
+            data = tmdb_get(url, params=params, lane=lane).json()
+            _ingest_results(data)
+            return data
+
+        except RateLimited as e:
+            record("rate_limited")
+            print(f"TMDb API skipped: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            record("upstream_errors")
+            print(f"TMDb API error (attempt {attempt+1}/{retries}): {e}")
+            if attempt < retries - 1:
+                time.sleep(delay)
+    return None
+
+
+def _store(key, data, warmed=False):
+    entry = {"data": data, "fresh_until": time.time() + settings.TMDB_CACHE_TTL, "warmed": warmed}
+    cache.set(key, entry, timeout=settings.TMDB_CACHE_TTL + settings.TMDB_CACHE_STALE_TTL)
+
+
+def _acquire_lock(lock_key):
+    """
+    Take the cross-worker fetch lock; returns an owner token, or None if
+    another worker holds it.
+    """
+    token = uuid.uuid4().hex
+    return token if cache.add(lock_key, token, timeout=settings.TMDB_LOCK_TTL) else None
+
+
+def _release_lock(lock_key, token):
+    # only delete our own lock: after TMDB_LOCK_TTL another worker may own it
+    # (get + delete isn't atomic, but narrows that window to almost nothing)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _fetch_shared(key, url, params, retries, delay, lane):
+    """
+    Cross-worker half of the single flight: one worker holds the lock and
+    fetches, the rest serve stale data or wait for the leader to publish.
+    """
+    lock_key = key + ":lock"
+    token = _acquire_lock(lock_key)
+    if token is None:
+        stale = cache.get(key)
+        if stale is not None:
+            record("served_stale")
+            return stale["data"]
+
+        deadline = time.monotonic() + settings.TMDB_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                record("coalesced_remote")
+                return entry["data"]
+            token = _acquire_lock(lock_key)
+            if token is not None:
+                break  # leader gave up without a result; take over
+        # on timeout, fetch ourselves but leave the leader's lock alone
+
+    try:
+        data = _fetch_upstream(url, params, retries, delay, lane)
+        if data is not None:
+            _store(key, data)
+        return data
+    finally:
+        if token is not None:
+            _release_lock(lock_key, token)
+
+
+def fetch_tmdb_data(url, params=None, retries=3, delay=2, lane=INTERACTIVE):
+    """
+    Safe TMDb fetcher. Handles paged "results" responses (upserting each
+    movie) and single-movie responses. Returns parsed JSON or None on total
+    failure (including no rate-limit token in time). Identical concurrent
+    calls share one upstream request.
+    """
+    record("requests")
+    key = request_key(url, params)
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        record("cache_hits")
+        if entry.get("warmed"):
+            record("warm_hits")
+        return entry["data"]
+
+    return _flight.do(key, lambda: _fetch_shared(key, url, params, retries, delay, lane))
+
+
+def warm_tmdb_data(url, params=None, ahead=0, lane=BACKGROUND):
+    """
+    Refresh the cached response for url+params unless it stays fresh for
+    more than `ahead` seconds or another fetch of it is in flight.
+    Returns "warmed", "fresh", "busy" or "failed".
+    """
+    key = request_key(url, params)
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] - time.time() > ahead:
+        return "fresh"
+
+    lock_key = key + ":lock"
+    token = _acquire_lock(lock_key)
+    if token is None:
+        return "busy"
+    try:
+        data = _fetch_upstream(url, params, retries=1, delay=0, lane=lane)
+        if data is None:
+            return "failed"
+        _store(key, data, warmed=True)
+        return "warmed"
+    finally:
+        # a background-lane token can take longer than TMDB_LOCK_TTL
+        _release_lock(lock_key, token)
+
+
+def movie_details_params(**extra):
+    params = {"api_key": settings.TMDB_API_KEY, "language": "en-US"}
+    params.update(extra)
+    return params
+
+
+def search_request(query):
+    """
+    (url, params) of a TMDb title search, as SearchView and warm_caches send it.
+    """
+    return f"{TMDB_API_URL}/search/movie", movie_details_params(query=query)
+
+
+def movie_detail_request(tmdb_id):
+    """
+    (url, params) of MovieDetailView's details + videos + credits call.
+    """
+    return f"{TMDB_API_URL}/movie/{tmdb_id}", movie_details_params(append_to_response="videos,credits")
+
+
+def _fetch_and_upsert_movie(tmdb_id, lane):
+    movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
+    if movie:
+        return movie
+    data = fetch_tmdb_data(f"{TMDB_API_URL}/movie/{tmdb_id}", params=movie_details_params(), lane=lane)
+    if not data or not data.get("id"):
+        return None
+    return upsert_movie(data)
+
+
+def get_or_fetch_movie(tmdb_id, lane=INTERACTIVE):
+    """
+    Return the local Movie for tmdb_id, fetching and storing it from TMDb if
+    needed. Concurrent callers in this process share one fetch-and-upsert.
+    """
+    movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
+    if movie:
+        return movie
+    return _flight.do(f"movie:{tmdb_id}", lambda: _fetch_and_upsert_movie(tmdb_id, lane))
@@ -0,0 +1,188 @@
+"""
+Trending score: recent local journal activity blended with TMDb popularity.
+
+Activity is aggregated in the DB per (movie, day, kind), so the Python
+side only sees one row per movie-day. Scores are then computed column-wise
+over flat arrays with a precomputed per-day decay table:
+
+    local(m)  = sum over days d of weight(kind) * count(m, d, kind) * 0.5 ** (age(d) / half_life)
+    score(m)  = w * local(m) / max(local) + (1 - w) * log1p(pop(m)) / log1p(max(pop))
+
+The top TRENDING_SIZE movies are written to TrendingRank in one
+transaction, so readers see either the old ranking or the new one.
+trending_sequence() reads that ranking for the home grid.
+"""
+import math
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .hotset import bump_catalog_version
+from .models import JournalEntry, Movie, TrendingRank
+
+# weight per unit of each kind of activity
+ACTIVITY_WEIGHTS = {
+    "added": 1.0,        # per entry created
+    "rated": 0.2,        # per rating point (a 10/10 counts as 2.0)
+    "favorited": 3.0,    # per entry currently marked favorite
+}
+
+
+def _activity_rows(since):
+    """
+    Yield (movie_id, day, kind, amount) aggregated over the window.
+    """
+    recent = JournalEntry.objects.order_by()
+    added = (
+        recent.filter(created_at__gte=since)
+        .annotate(day=TruncDate("created_at"))
+        .values("movie_id", "day")
+        .annotate(amount=Count("id"))
+    )
+    rated = (
+        recent.filter(updated_at__gte=since, rating__isnull=False)
+        .annotate(day=TruncDate("updated_at"))
+        .values("movie_id", "day")
+        .annotate(amount=Sum("rating"))
+    )
+    favorited = (
+        recent.filter(updated_at__gte=since, status=JournalEntry.STATUS_FAVORITE)
+        .annotate(day=TruncDate("updated_at"))
+        .values("movie_id", "day")
+        .annotate(amount=Count("id"))
+    )
+    for kind, qs in (("added", added), ("rated", rated), ("favorited", favorited)):
+        for row in qs.iterator():
+            yield row["movie_id"], row["day"], kind, row["amount"] or 0
+
+
+def compute_scores(now=None):
+    """
+    Return a list of (score, movie_id), best first, at most TRENDING_SIZE long.
+    """
+    now = now or timezone.now()
+    today = now.date()
+    window = settings.TRENDING_WINDOW_DAYS
+    half_life = settings.TRENDING_HALF_LIFE_DAYS
+    decay = array("d", (0.5 ** (age / half_life) for age in range(window + 1)))
+
+    # candidates: every movie with recent activity + the TMDb-popular head
+    slot_of = {}
+    movie_ids = array("q")
+    local = array("d")
+
+    def slot(movie_id):
+        i = slot_of.get(movie_id)
+        if i is None:
+            i = slot_of[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+            local.append(0.0)
+        return i
+
+    for movie_id, day, kind, amount in _activity_rows(now - timedelta(days=window)):
+        age = min(max((today - day).days, 0), window)
+        local[slot(movie_id)] += ACTIVITY_WEIGHTS[kind] * amount * decay[age]
+
+    size = settings.TRENDING_SIZE
+    for movie_id in Movie.objects.order_by("-popularity").values_list("id", flat=True)[:size]:
+        slot(movie_id)
+
+    if not movie_ids:
+        return []
+
+    popularity = array("d", bytes(8 * len(movie_ids)))
+    ids = list(movie_ids)
+    for start in range(0, len(ids), 1000):
+        chunk = ids[start:start + 1000]
+        for movie_id, pop in Movie.objects.filter(id__in=chunk).values_list("id", "popularity"):
+            popularity[slot_of[movie_id]] = pop or 0.0
+
+    max_local = max(local) or 1.0
+    max_pop = math.log1p(max(popularity)) or 1.0
+    w = settings.TRENDING_LOCAL_WEIGHT
+    scores = [
+        w * (l / max_local) + (1 - w) * (math.log1p(p) / max_pop)
+        for l, p in zip(local, popularity)
+    ]
+
+    ranked = sorted(zip(scores, movie_ids), key=lambda sm: (-sm[0], sm[1]))
+    return ranked[:size]
+
+
+def rebuild_trending(now=None):
+    """
+    Recompute and atomically replace the TrendingRank table.
+    Returns the number of ranked movies.
+    """
+    now = now or timezone.now()
+    ranked = compute_scores(now)
+    rows = [
+        TrendingRank(movie_id=movie_id, rank=rank, score=score, computed_at=now)
+        for rank, (score, movie_id) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        TrendingRank.objects.all().delete()
+        TrendingRank.objects.bulk_create(rows, batch_size=1000)
+    bump_catalog_version()
+    return len(rows)
+
+
+class TrendingSequence:
+    """
+    Paginator-compatible concatenation of two ordered querysets: the ranked
+    movies, then the rest. Like a queryset it has count() and values_list(),
+    so the hot-set snapshot can be built from it too.
+    """
+    def __init__(self, ranked, rest):
+        self.ranked = ranked
+        self.rest = rest
+        self._ranked_count = None
+
+    def _split(self):
+        if self._ranked_count is None:
+            self._ranked_count = self.ranked.count()
+        return self._ranked_count
+
+    def count(self):
+        return self._split() + self.rest.count()
+
+    def __len__(self):
+        return self.count()
+
+    def values_list(self, *fields, **kwargs):
+        return TrendingSequence(
+            self.ranked.values_list(*fields, **kwargs), self.rest.values_list(*fields, **kwargs)
+        )
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        split = self._split()
+        rows = []
+        if start < split:
+            rows += self.ranked[start:split if stop is None else min(stop, split)]
+        if stop is None or stop > split:
+            rows += self.rest[max(start - split, 0):None if stop is None else stop - split]
+        return rows
+
+
+def trending_sequence(movies, rest_ordering):
+    """
+    `movies` (an unordered, possibly filtered Movie queryset) in trending
+    order: ranked movies by rank, read through TrendingRank's unique rank
+    index, then every unranked one in `rest_ordering`, read through that
+    ordering's index on Movie. Neither half sorts.
+    """
+    ranked = TrendingRank.objects.filter(movie=OuterRef("pk"))
+    return TrendingSequence(
+        movies.filter(trending__isnull=False).order_by("trending__rank"),
+        # NOT EXISTS rather than LEFT JOIN ... IS NULL: PostgreSQL plans it
+        # as an anti-join instead of expecting a single row and sorting
+        movies.exclude(Exists(ranked)).order_by(*rest_ordering),
+    )
@@ -1,28 +1,36 @@
 from django.urls import path, include
-from .views import (
-    HomeView, SearchView, MovieDetailView,
-    AddToJournalView, EditJournalEntryView, MyJournalView,
-    signup_view
-)
-from .views import UpdateStatusView, RateView
 
+from .lazy import lazy_view
+
+# Views are referenced by dotted path and imported on first use (core/lazy.py),
+# so a cold process only loads the view modules its requests actually reach.
 urlpatterns = [
-    path("", HomeView.as_view(), name="home"),
-    path("search/", SearchView.as_view(), name="search"),
-    path("movie/<int:tmdb_id>/", MovieDetailView.as_view(), name="movie_detail"),
+    path("", lazy_view("core.views.HomeView"), name="home"),
+    path("search/", lazy_view("core.views.SearchView"), name="search"),
+    path("search/suggest/", lazy_view("core.views.SuggestView"), name="search_suggest"),
+    path("movie/<int:tmdb_id>/", lazy_view("core.views.MovieDetailView"), name="movie_detail"),
+    path("person/<int:tmdb_id>/", lazy_view("core.views.PersonView"), name="person_detail"),
 
     # Journal
-    path("journal/add/<int:tmdb_id>/", AddToJournalView.as_view(), name="add_to_journal"),
-    path("journal/edit/<int:pk>/", EditJournalEntryView.as_view(), name="edit_journal_entry"),
-    path("journal/my/", MyJournalView.as_view(), name="my_journal"),
+    path("journal/add/<int:tmdb_id>/", lazy_view("core.views.AddToJournalView"), name="add_to_journal"),
+    path("journal/edit/<int:pk>/", lazy_view("core.views.EditJournalEntryView"), name="edit_journal_entry"),
+    path("journal/edit/<int:pk>/comments/", lazy_view("core.views.EntryCommentsView"), name="journal_entry_comments"),
+    path("journal/my/", lazy_view("core.views.MyJournalView"), name="my_journal"),
 
     # Signup (local simple signup view)
-    path("signup/", signup_view, name="signup"),
+    path("signup/", lazy_view("core.views.signup_view"), name="signup"),
 
     # Auth routes (login/logout/password) under /accounts/
     path("accounts/", include("django.contrib.auth.urls")),
 
-    path("journal/status/<int:tmdb_id>/", UpdateStatusView.as_view(), name="journal_update_status"),
-    path("journal/rate/<int:tmdb_id>/", RateView.as_view(), name="journal_rate"),
-]
+    path("journal/status/<int:tmdb_id>/", lazy_view("core.views.UpdateStatusView"), name="journal_update_status"),
+    path("journal/rate/<int:tmdb_id>/", lazy_view("core.views.RateView"), name="journal_rate"),
 
+    # Follow graph / activity timeline
+    path("timeline/", lazy_view("core.views.TimelineView"), name="timeline"),
+    path("users/<str:username>/", lazy_view("core.views.UserProfileView"), name="user_profile"),
+    path("users/<str:username>/follow/", lazy_view("core.views.FollowView"), name="follow_user"),
+
+    # Read-only JSON API
+    path("api/v1/", include("core.api_urls")),
+]
@@ -1,19 +1,30 @@
-import os
-import time
-import requests
+import datetime
 
-from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse
 from django.views import View
 from django.core.paginator import Paginator
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth import login as auth_login
+from django.contrib.auth import get_user_model, login as auth_login
 
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
 from django.utils.decorators import method_decorator
 
-from .models import Movie, JournalEntry, Comment
+from .models import Credit, Genre, Movie, JournalEntry, Comment, Follow, Person, TimelineItem, TrendingRank
 from .forms import JournalEntryForm, CommentForm
+from .hotset import HotSetSequence, get_hotset
+from .journal_search import search_journal
+from .pagination import keyset_page
+from .querylog import log_movie_view, log_search, normalize_search
+from .suggest import get_suggest_index
+from .timeline import follower_count, publish_activity, timeline_page
+from .trending import trending_sequence
+from .tmdb import (
+    fetch_tmdb_data, get_or_fetch_movie, movie_detail_request,
+    search_request, store_credits, sync_movie_genres, upsert_movie,
+)
 
 
 def signup_view(request):
@@ -32,61 +43,112 @@ def signup_view(request):
     return render(request, "registration/signup.html", {"form": form})
 
 
-def fetch_tmdb_data(url, params=None, retries=3, delay=2):
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name, ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _year_param(request, name):
     """
-    Safe TMDb fetcher. Handles paged "results" responses and single-movie
-    responses. Coerces None -> "" for fields that must not be NULL in DB.
-    Returns parsed JSON or None on total failure.
+    Year filter clamped to what datetime.date accepts (1..9999).
     """
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, params=params, timeout=6)
-            response.raise_for_status()
-            data = response.json()
-
-            # If this is a search/multi-page response with "results"
-            if isinstance(data, dict) and "results" in data and isinstance(data["results"], list):
-                for movie in data["results"]:
-                    tmdb_id = movie.get("id")
-                    title = movie.get("title") or movie.get("name") or ""
-                    overview = movie.get("overview") or ""
-                    poster_path = movie.get("poster_path") or ""      # avoid None
-                    release_date = movie.get("release_date") or ""
-                    popularity = movie.get("popularity") or 0
-
-                    try:
-                        Movie.objects.update_or_create(
-                            tmdb_id=tmdb_id,
-                            defaults={
-                                "title": title,
-                                "overview": overview,
-                                "poster_path": poster_path,
-                                "release_date": release_date,
-                                "popularity": popularity,
-                            }
-                        )
-                    except Exception as e:
-                        # log and continue
-                        print(f"Skipping movie id={tmdb_id} due to DB error: {e}")
-
-            # For single-movie endpoints (no "results"), return data to caller.
-            return data
-
-        except requests.exceptions.RequestException as e:
-            print(f"TMDb API error (attempt {attempt+1}/{retries}): {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                return None
+    year = _int_param(request, name)
+    return None if year is None else min(max(year, 1), 9999)
+
+
+def _genre_key(field, by_genre):
+    """
+    Lookup path of a Movie sort key, or of its copy on the MovieGenre row
+    of the filtered genre.
+    """
+    return f"moviegenre__{field}" if by_genre else field
 
 
 class HomeView(View):
+    # sort key -> ordering; each one is served by an index on Movie. "trending"
+    # is ranked movies by rank, then the rest of the catalog in its ordering
+    # here (see trending_sequence), so it never hides unranked movies.
+    SORTS = {
+        "trending": ("-popularity", "id"),
+        "popular": ("-popularity", "id"),
+        "newest": ("-release_date", "-popularity"),
+        "oldest": ("release_date", "popularity"),
+        "title": ("title", "id"),
+    }
+    # the same orderings within one genre, read from the copies of the sort
+    # keys on its MovieGenre rows (the moviegenre_*_idx composites)
+    GENRE_SORTS = {
+        "trending": ("-moviegenre__popularity", "moviegenre__movie_id"),
+        "popular": ("-moviegenre__popularity", "moviegenre__movie_id"),
+        "newest": ("-moviegenre__release_date", "-moviegenre__popularity"),
+        "oldest": ("moviegenre__release_date", "moviegenre__popularity"),
+        "title": ("moviegenre__title", "moviegenre__movie_id"),
+    }
+
+    FILTER_PARAMS = ("q", "sort", "year_from", "year_to", "genre")
+
+    def _sorted_qs(self, sort, filters=None, by_genre=False):
+        """
+        Movies matching `filters` in `sort` order. Each sort, on its own or
+        within a genre, and a year range with newest/oldest, is read along
+        one index with no sort step. A year range with popular, title or
+        trending may be sort-bounded instead: the range is read from a
+        release-date index and only the movies in it are sorted (SQLite
+        always does this; PostgreSQL scans the sort's index when the range
+        is wide). A title search filters along either, though PostgreSQL may
+        sort the few matches it expects instead. The lookups go into one
+        filter() call so that they, and the ordering, share a single
+        MovieGenre join.
+        """
+        filters = dict(filters or {})
+        if sort in ("newest", "oldest"):
+            filters[_genre_key("release_date", by_genre) + "__isnull"] = False
+        movies = Movie.objects.filter(**filters)
+        sorts = self.GENRE_SORTS if by_genre else self.SORTS
+        if sort == "trending":
+            return trending_sequence(movies, sorts[sort])
+        return movies.order_by(*sorts[sort])
+
+    def _default_listing(self):
+        sort = "trending" if TrendingRank.objects.exists() else "popular"
+        return sort, self._sorted_qs(sort)
+
     def get(self, request):
         query = request.GET.get("q")
-        movies_qs = Movie.objects.all().order_by("-popularity")
-
-        if query:
-            movies_qs = movies_qs.filter(title__icontains=query)
+        sort = request.GET.get("sort")
+        year_from = _year_param(request, "year_from")
+        year_to = _year_param(request, "year_to")
+        genre_id = _int_param(request, "genre")
+        genres = list(Genre.objects.values("id", "tmdb_id", "name"))
+
+        if not any(request.GET.get(p) for p in self.FILTER_PARAMS):
+            # unfiltered default grid: first pages come from the in-memory snapshot
+            hotset = get_hotset(self._default_listing)
+            if hotset is not None:
+                sort = hotset.sort
+                movies_qs = HotSetSequence(hotset, self._sorted_qs(sort))
+            else:
+                sort, movies_qs = self._default_listing()
+        else:
+            if sort not in self.SORTS:
+                sort = "trending" if TrendingRank.objects.exists() else "popular"
+            filters = {}
+            by_genre = False
+
+            if genre_id:
+                genre = next((g for g in genres if g["tmdb_id"] == genre_id), None)
+                filters["moviegenre__genre"] = genre["id"] if genre else None  # None matches nothing
+                by_genre = True
+            if query:
+                filters[_genre_key("title", by_genre) + "__icontains"] = query
+            release_date = _genre_key("release_date", by_genre)
+            if year_from:
+                filters[release_date + "__gte"] = datetime.date(year_from, 1, 1)
+            if year_to:
+                filters[release_date + "__lte"] = datetime.date(year_to, 12, 31)
+            movies_qs = self._sorted_qs(sort, filters, by_genre)
 
         paginator = Paginator(movies_qs, 20)  # 20 movies per page
         page_number = request.GET.get("page")
@@ -105,6 +167,13 @@ class HomeView(View):
         return render(request, "core/home.html", {
             "page_obj": page_obj,
             "page_range": page_range,
+            "genres": genres,
+            "filters": {
+                "sort": sort,
+                "year_from": year_from or "",
+                "year_to": year_to or "",
+                "genre": genre_id,
+            },
         })
 
 
@@ -116,28 +185,12 @@ class SearchView(View):
         page_range = []
 
         if query:
-            # Always call TMDb (to fill DB) then query DB for consistent results
-            tmdb_url = "https://api.themoviedb.org/3/search/movie"
-            params = {
-                "api_key": settings.TMDB_API_KEY,
-                "query": query,
-                "language": "en-US"
-            }
-            data = fetch_tmdb_data(tmdb_url, params=params)
-
-            if data and "results" in data:
-                for m in data["results"]:
-                    # safe coercion for fields which might be None
-                    Movie.objects.update_or_create(
-                        tmdb_id=m.get("id"),
-                        defaults={
-                            "title": m.get("title") or "",
-                            "overview": m.get("overview") or "",
-                            "poster_path": m.get("poster_path") or "",
-                            "release_date": m.get("release_date") or "",
-                            "popularity": m.get("popularity") or 0,
-                        }
-                    )
+            # Call TMDb (cached; fetch_tmdb_data upserts every movie in "results")
+            # then query DB for consistent results
+            if not request.GET.get("page"):
+                log_search(query)
+            tmdb_url, params = search_request(normalize_search(query))
+            fetch_tmdb_data(tmdb_url, params=params)
 
             # Now query DB for combined/consistent results
             movies = Movie.objects.filter(title__icontains=query).order_by("-popularity")
@@ -163,41 +216,48 @@ class SearchView(View):
         })
 
 
+class SuggestView(View):
+    """
+    GET ?q=<text>&limit=<n>: autocomplete suggestions from the in-process
+    title index. Never calls TMDb.
+    """
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        try:
+            limit = int(request.GET.get("limit", 10))
+        except (TypeError, ValueError):
+            limit = 10
+        limit = max(1, min(limit, 25))
+
+        results = get_suggest_index().search(query, limit=limit) if query else []
+        return JsonResponse({"query": query, "results": results})
+
+
 class MovieDetailView(View):
     def get(self, request, tmdb_id):
         # get local movie (or 404)
         movie = get_object_or_404(Movie, tmdb_id=tmdb_id)
 
-        # Ensure DB has reasonable base info (this keeps existing behaviour)
-        if not movie.overview or not movie.poster_path:
-            tmdb_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-            params = {"api_key": settings.TMDB_API_KEY, "language": "en-US"}
-            data = fetch_tmdb_data(tmdb_url, params=params)
-            if data:
-                Movie.objects.update_or_create(
-                    tmdb_id=data.get("id"),
-                    defaults={
-                        "title": data.get("title") or movie.title or "",
-                        "overview": data.get("overview") or movie.overview or "",
-                        "poster_path": data.get("poster_path") or movie.poster_path or "",
-                        "release_date": data.get("release_date") or movie.release_date or "",
-                        "popularity": data.get("popularity") or movie.popularity or 0,
-                    }
-                )
-                movie = Movie.objects.get(tmdb_id=tmdb_id)
+        # fetch full movie details + videos + credits in one (cached, coalesced) call
+        log_movie_view(tmdb_id)
+        tmdb_url, params = movie_detail_request(tmdb_id)
+        data = fetch_tmdb_data(tmdb_url, params=params)
 
-        # --- Extra TMDb fetch for genres/runtime/videos (no DB writes) ---
+        # Ensure DB has reasonable base info (this keeps existing behaviour)
+        if data and (not movie.overview or not movie.poster_path):
+            movie = upsert_movie(data, fallback=movie)
+        elif data and not movie.genres.exists():
+            sync_movie_genres(movie, data)
+        if data and not Credit.objects.filter(movie=movie).exists():
+            store_credits(movie, data)
+
+        # --- Extras from the same response: genres/runtime/videos (no DB writes) ---
         extra_genres = []
         runtime = None
         runtime_display = None
         trailer_embed = None
         cast = []
 
-        # fetch full movie details + videos in one call
-        tmdb_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-        params = {"api_key": settings.TMDB_API_KEY, "language": "en-US", "append_to_response": "videos,credits"}
-        data = fetch_tmdb_data(tmdb_url, params=params)
-
         if data:
             # genres (list of names)
             genres = data.get("genres") or []
@@ -233,6 +293,7 @@ class MovieDetailView(View):
             top_cast = raw_cast[:8]
             for member in top_cast:
                 cast.append({
+                    "person_id": member.get("id"),
                     "name": member.get("name") or "",
                     "character": member.get("character") or "",
                     "profile_path": member.get("profile_path") or "",
@@ -264,28 +325,43 @@ class MovieDetailView(View):
 
 
 
+class PersonView(View):
+    """
+    A cast member and their filmography (newest first), from stored credits
+    only: one join for the films, one batched lookup of the viewer's entries.
+    """
+    def get(self, request, tmdb_id):
+        person = get_object_or_404(Person, tmdb_id=tmdb_id)
+        credits = list(
+            Credit.objects.filter(person=person)
+            .select_related("movie")
+            .order_by(F("movie__release_date").desc(nulls_last=True), "movie__title")
+        )
+
+        entries = {}
+        if request.user.is_authenticated and credits:
+            entries = {
+                movie_id: (status, rating)
+                for movie_id, status, rating in JournalEntry.objects.filter(
+                    user=request.user, movie_id__in=[c.movie_id for c in credits]
+                ).values_list("movie_id", "status", "rating")
+            }
+        for credit in credits:
+            credit.journal_status, credit.journal_rating = entries.get(credit.movie_id, (None, None))
+
+        return render(request, "core/person_detail.html", {
+            "person": person,
+            "credits": credits,
+        })
+
+
 # -------------------------
 # Journal views (additive)
 # -------------------------
 @method_decorator(login_required, name="dispatch")
 class AddToJournalView(View):
     def post(self, request, tmdb_id):
-        movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
-        if not movie:
-            tmdb_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-            params = {"api_key": settings.TMDB_API_KEY, "language": "en-US"}
-            data = fetch_tmdb_data(tmdb_url, params=params)
-            if data:
-                movie, _ = Movie.objects.update_or_create(
-                    tmdb_id=data.get("id"),
-                    defaults={
-                        "title": data.get("title") or "",
-                        "overview": data.get("overview") or "",
-                        "poster_path": data.get("poster_path") or "",
-                        "release_date": data.get("release_date") or "",
-                        "popularity": data.get("popularity") or 0,
-                    },
-                )
+        movie = get_or_fetch_movie(tmdb_id)
 
         if not movie:
             return redirect("home")
@@ -294,33 +370,110 @@ class AddToJournalView(View):
         return redirect("edit_journal_entry", pk=entry.pk)
 
 
+COMMENTS_PAGE_SIZE = 20
+
+
+def _comment_page(entry, cursor=None):
+    """
+    Newest-first page of an entry's comments plus the cursor for the next
+    (older) page. Raises ValueError for a malformed cursor.
+    """
+    qs = Comment.objects.filter(entry=entry).select_related("user")
+    return keyset_page(qs, ("created_at", "id"), cursor=cursor, limit=COMMENTS_PAGE_SIZE)
+
+
 @method_decorator(login_required, name="dispatch")
 class EditJournalEntryView(View):
+    def _get_entry(self, request, pk):
+        return get_object_or_404(
+            JournalEntry.objects.select_related("movie"), pk=pk, user=request.user
+        )
+
+    def _render(self, request, entry, form, comment_form):
+        comments, older_cursor = _comment_page(entry)
+        comments.reverse()  # show oldest of the page first
+        return render(request, "core/journal_entry_form.html", {
+            "form": form,
+            "entry": entry,
+            "comment_form": comment_form,
+            "comments": comments,
+            "older_cursor": older_cursor,
+        })
+
     def get(self, request, pk):
-        entry = JournalEntry.objects.get(pk=pk, user=request.user)
-        form = JournalEntryForm(instance=entry)
-        comment_form = CommentForm()
-        return render(request, "core/journal_entry_form.html", {"form": form, "entry": entry, "comment_form": comment_form})
+        entry = self._get_entry(request, pk)
+        return self._render(request, entry, JournalEntryForm(instance=entry), CommentForm())
 
     def post(self, request, pk):
-        entry = JournalEntry.objects.get(pk=pk, user=request.user)
+        entry = self._get_entry(request, pk)
         form = JournalEntryForm(request.POST, instance=entry)
         comment_form = CommentForm(request.POST)
         if "save_entry" in request.POST and form.is_valid():
-            form.save()
+            entry = form.save()
+            if form.has_changed() and entry.review.strip():
+                publish_activity(entry, TimelineItem.VERB_REVIEWED)
             return redirect("my_journal")
         if "add_comment" in request.POST and comment_form.is_valid():
             comment = comment_form.save(commit=False)
             comment.user = request.user
             comment.entry = entry
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                JournalEntry.objects.filter(pk=entry.pk).update(
+                    comment_count=F("comment_count") + 1
+                )
             return redirect("edit_journal_entry", pk=entry.pk)
-        return render(request, "core/journal_entry_form.html", {"form": form, "entry": entry, "comment_form": comment_form})
+        return self._render(request, entry, form, comment_form)
+
+
+@method_decorator(login_required, name="dispatch")
+class EntryCommentsView(View):
+    """
+    GET ?before=<cursor>: JSON page of older comments on one of the user's
+    entries, newest first, with the cursor for the page after it.
+    """
+    def get(self, request, pk):
+        entry = get_object_or_404(JournalEntry.objects.only("pk"), pk=pk, user=request.user)
+        try:
+            comments, next_cursor = _comment_page(entry, cursor=request.GET.get("before"))
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid cursor"}, status=400)
+
+        return JsonResponse({
+            "ok": True,
+            "comments": [
+                {
+                    "id": c.pk,
+                    "user": c.user.get_username(),
+                    "text": c.text,
+                    "created_at": c.created_at.isoformat(),
+                }
+                for c in comments
+            ],
+            "next": next_cursor,
+        })
 
 
 @method_decorator(login_required, name="dispatch")
 class MyJournalView(View):
+    """
+    The user's entries, most recently updated first; with ?q=, a ranked
+    full-text search over their reviews, moods and comments instead
+    (?after=<cursor> for the next page of hits).
+    """
     def get(self, request):
+        query = request.GET.get("q", "").strip()
+        if query:
+            try:
+                hits, next_cursor = search_journal(request.user, query, cursor=request.GET.get("after"))
+            except ValueError:
+                hits, next_cursor = search_journal(request.user, query)
+            return render(request, "core/my_journal.html", {
+                "query": query,
+                "hits": hits,
+                "next_cursor": next_cursor,
+            })
+
         qs = JournalEntry.objects.filter(user=request.user).select_related("movie")
         paginator = Paginator(qs, 20)
         page_number = request.GET.get("page")
@@ -343,28 +496,14 @@ class UpdateStatusView(View):
         if status not in ("watched", "watchlist", "favorite"):
             return JsonResponse({"ok": False, "error": "invalid status"}, status=400)
 
-        movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
-        if not movie:
-            tmdb_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-            params = {"api_key": settings.TMDB_API_KEY, "language": "en-US"}
-            data = fetch_tmdb_data(tmdb_url, params=params)
-            if data:
-                movie, _ = Movie.objects.update_or_create(
-                    tmdb_id=data.get("id"),
-                    defaults={
-                        "title": data.get("title") or "",
-                        "overview": data.get("overview") or "",
-                        "poster_path": data.get("poster_path") or "",
-                        "release_date": data.get("release_date") or "",
-                        "popularity": data.get("popularity") or 0,
-                    },
-                )
+        movie = get_or_fetch_movie(tmdb_id)
         if not movie:
             return JsonResponse({"ok": False, "error": "movie not found"}, status=404)
 
         entry, _ = JournalEntry.objects.get_or_create(user=request.user, movie=movie)
         entry.status = status
         entry.save()
+        publish_activity(entry, TimelineItem.VERB_STATUS)
         return JsonResponse({"ok": True, "status": entry.status})
 
 
@@ -382,26 +521,66 @@ class RateView(View):
         if rating < 1 or rating > 10:
             return JsonResponse({"ok": False, "error": "rating out of range"}, status=400)
 
-        movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
-        if not movie:
-            tmdb_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-            params = {"api_key": settings.TMDB_API_KEY, "language": "en-US"}
-            data = fetch_tmdb_data(tmdb_url, params=params)
-            if data:
-                movie, _ = Movie.objects.update_or_create(
-                    tmdb_id=data.get("id"),
-                    defaults={
-                        "title": data.get("title") or "",
-                        "overview": data.get("overview") or "",
-                        "poster_path": data.get("poster_path") or "",
-                        "release_date": data.get("release_date") or "",
-                        "popularity": data.get("popularity") or 0,
-                    },
-                )
+        movie = get_or_fetch_movie(tmdb_id)
         if not movie:
             return JsonResponse({"ok": False, "error": "movie not found"}, status=404)
 
         entry, _ = JournalEntry.objects.get_or_create(user=request.user, movie=movie)
         entry.rating = rating
         entry.save()
+        publish_activity(entry, TimelineItem.VERB_RATED)
         return JsonResponse({"ok": True, "rating": entry.rating})
+
+
+# -------------------------
+# Follow graph / timeline
+# -------------------------
+@method_decorator(login_required, name="dispatch")
+class TimelineView(View):
+    """
+    Activity from the people the user follows, newest first (?before=<cursor>).
+    """
+    def get(self, request):
+        try:
+            items, older_cursor = timeline_page(request.user, cursor=request.GET.get("before"))
+        except ValueError:
+            items, older_cursor = timeline_page(request.user)
+        return render(request, "core/timeline.html", {
+            "items": items,
+            "older_cursor": older_cursor,
+        })
+
+
+class UserProfileView(View):
+    def get(self, request, username):
+        profile_user = get_object_or_404(get_user_model(), username=username)
+        # the user's own outbox
+        items = list(
+            TimelineItem.objects.filter(owner=profile_user, actor=profile_user)
+            .select_related("movie")[:20]
+        )
+        is_following = (
+            request.user.is_authenticated
+            and Follow.objects.filter(follower=request.user, followee=profile_user).exists()
+        )
+        return render(request, "core/user_profile.html", {
+            "profile_user": profile_user,
+            "items": items,
+            "is_following": is_following,
+            "follower_count": follower_count(profile_user.pk),
+        })
+
+
+@method_decorator(login_required, name="dispatch")
+class FollowView(View):
+    """
+    POST: follow (or, with unfollow=1, unfollow) the given user.
+    """
+    def post(self, request, username):
+        followee = get_object_or_404(get_user_model(), username=username)
+        if followee != request.user:
+            if request.POST.get("unfollow"):
+                Follow.objects.filter(follower=request.user, followee=followee).delete()
+            else:
+                Follow.objects.get_or_create(follower=request.user, followee=followee)
+        return redirect("user_profile", username=followee.get_username())
@@ -14,15 +14,23 @@ from pathlib import Path
 
 
 import os
-from dotenv import load_dotenv
-import dj_database_url
 
-load_dotenv()
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Only pay for python-dotenv when there is a .env file (serverless deploys
+# get their environment from the platform).
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / ".env")
 
 TMDB_API_KEY = os.getenv('TMDB_API_KEY')
 
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+# Upper bound on titles held by the in-process autocomplete index (core/suggest.py)
+SUGGEST_INDEX_MAX_TITLES = int(os.environ.get("SUGGEST_INDEX_MAX_TITLES", "2000000"))
+# seconds before a worker rebuilds its index to pick up movies saved elsewhere
+# (a catalog version bump from refresh_movies triggers it sooner)
+SUGGEST_INDEX_MAX_AGE = float(os.environ.get("SUGGEST_INDEX_MAX_AGE", "900"))
 
 
 # Quick-start development settings - unsuitable for production
@@ -165,8 +173,107 @@ DATABASES = {
 # If DATABASE_URL is set (Railway/Postgres), override the default
 DATABASE_URL = os.environ.get("DATABASE_URL")
 if DATABASE_URL:
+    import dj_database_url
     DATABASES['default'] = dj_database_url.parse(DATABASE_URL)
 
+# Optional read replicas, comma-separated URLs (core/db_router.py). To try it
+# locally, point a replica at the same SQLite file as the primary:
+#   DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///db.sqlite3
+DATABASE_REPLICAS = []
+for i, url in enumerate(filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")), start=1):
+    import dj_database_url
+    alias = f"replica{i}"
+    DATABASES[alias] = dj_database_url.parse(url.strip())
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+        'core.db_router.PrimaryPinningMiddleware',
+    )
+
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "30"))
+REPLICA_HEALTH_INTERVAL = float(os.environ.get("REPLICA_HEALTH_INTERVAL", "10"))
+REPLICA_RETRY_SECONDS = float(os.environ.get("REPLICA_RETRY_SECONDS", "30"))
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", "5"))
+
+
+# Cache: per-process by default. Point REDIS_URL or CACHE_TABLE at a shared
+# store so the TMDb single-flight lock, rate limit and metrics work across
+# workers (with CACHE_TABLE their counters live in core.SharedCounter, see
+# core/counters.py).
+REDIS_URL = os.environ.get("REDIS_URL")
+CACHE_TABLE = os.environ.get("CACHE_TABLE")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif CACHE_TABLE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': CACHE_TABLE,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# TMDb response caching / request coalescing (core/tmdb.py), in seconds
+TMDB_CACHE_TTL = int(os.environ.get("TMDB_CACHE_TTL", "600"))
+TMDB_CACHE_STALE_TTL = int(os.environ.get("TMDB_CACHE_STALE_TTL", "3600"))
+TMDB_LOCK_TTL = int(os.environ.get("TMDB_LOCK_TTL", "15"))
+TMDB_LOCK_WAIT = float(os.environ.get("TMDB_LOCK_WAIT", "3"))
+
+# Cluster-wide TMDb rate limit (core/ratelimit.py): requests/second, the share
+# of it background work may use, seconds to recover after a 429, and how long
+# each lane waits for a token before giving up
+TMDB_RATE_LIMIT = float(os.environ.get("TMDB_RATE_LIMIT", "40"))
+TMDB_BACKGROUND_SHARE = float(os.environ.get("TMDB_BACKGROUND_SHARE", "0.5"))
+TMDB_RATE_RECOVERY = float(os.environ.get("TMDB_RATE_RECOVERY", "60"))
+TMDB_INTERACTIVE_MAX_WAIT = float(os.environ.get("TMDB_INTERACTIVE_MAX_WAIT", "2"))
+TMDB_BACKGROUND_MAX_WAIT = float(os.environ.get("TMDB_BACKGROUND_MAX_WAIT", "120"))
+
+# Sampled query log (core/querylog.py) and `manage.py warm_caches`: fraction of
+# searches / detail views counted, days a counter stays relevant, how many of
+# each kind to warm, how many seconds before expiry to refresh, and threads
+QUERYLOG_SAMPLE_RATE = float(os.environ.get("QUERYLOG_SAMPLE_RATE", "0.1"))
+QUERYLOG_WINDOW_DAYS = int(os.environ.get("QUERYLOG_WINDOW_DAYS", "7"))
+WARM_TOP_K = int(os.environ.get("WARM_TOP_K", "100"))
+WARM_AHEAD = int(os.environ.get("WARM_AHEAD", "120"))
+WARM_WORKERS = int(os.environ.get("WARM_WORKERS", "4"))
+
+
+# Background jobs (core/background.py): thread pool size, or run inline
+BACKGROUND_WORKERS = int(os.environ.get("BACKGROUND_WORKERS", "2"))
+BACKGROUND_SYNC = os.environ.get("BACKGROUND_SYNC", "False").lower() == "true"
+
+# Activity timelines (core/timeline.py)
+TIMELINE_MAX_ITEMS = int(os.environ.get("TIMELINE_MAX_ITEMS", "500"))
+TIMELINE_TRIM_RATE = float(os.environ.get("TIMELINE_TRIM_RATE", "0.05"))
+# actors with more followers than this are read from their outbox instead of fanned out
+FANOUT_MAX_FOLLOWERS = int(os.environ.get("FANOUT_MAX_FOLLOWERS", "5000"))
+
+
+# Trending ranking (core/trending.py, `manage.py compute_trending`)
+TRENDING_SIZE = int(os.environ.get("TRENDING_SIZE", "2000"))
+TRENDING_WINDOW_DAYS = int(os.environ.get("TRENDING_WINDOW_DAYS", "14"))
+TRENDING_HALF_LIFE_DAYS = float(os.environ.get("TRENDING_HALF_LIFE_DAYS", "3"))
+TRENDING_LOCAL_WEIGHT = float(os.environ.get("TRENDING_LOCAL_WEIGHT", "0.5"))
+
+
+# Per-worker snapshot of the top of the home grid (core/hotset.py)
+HOTSET_SIZE = int(os.environ.get("HOTSET_SIZE", "200"))
+HOTSET_MAX_AGE = float(os.environ.get("HOTSET_MAX_AGE", "300"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
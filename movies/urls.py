@@ -1,6 +1,6 @@
 from django.urls import path
-from .views import test_tmdb
+from core.lazy import lazy_view
 
 urlpatterns = [
-    path('test-tmdb/', test_tmdb, name='test_tmdb'),
+    path('test-tmdb/', lazy_view('movies.views.test_tmdb'), name='test_tmdb'),
 ]
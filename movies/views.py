@@ -1,12 +1,13 @@
 from django.shortcuts import render
 import os
-import requests
 from django.http import JsonResponse
 
 def test_tmdb(request):
+    from core.tmdb import TMDB_API_URL, tmdb_get
+
     api_key = os.getenv('TMDB_API_KEY')
-    url = f"https://api.themoviedb.org/3/movie/550?api_key={api_key}"  # 550 = Fight Club
-    response = requests.get(url)
+    url = f"{TMDB_API_URL}/movie/550"  # 550 = Fight Club
+    response = tmdb_get(url, params={"api_key": api_key})
     data = response.json()
     return JsonResponse(data)
 
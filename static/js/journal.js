@@ -262,3 +262,60 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 });
 
+
+/* ====== Search-as-you-type suggestions ====== */
+// inputs with data-suggest-url fill their <datalist> from /search/suggest/
+document.addEventListener('input', (e) => {
+  const input = e.target.closest('[data-suggest-url]');
+  if (!input) return;
+
+  clearTimeout(input._suggestTimer);
+  input._suggestTimer = setTimeout(async () => {
+    const q = input.value.trim();
+    const list = input.list;
+    if (!list) return;
+    if (!q) { list.innerHTML = ''; return; }
+
+    const resp = await fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(q)}`);
+    const json = await resp.json().catch(() => null);
+    if (!json || input.value.trim() !== q) return;
+
+    list.innerHTML = '';
+    json.results.forEach(r => {
+      const opt = document.createElement('option');
+      opt.value = r.title;
+      list.appendChild(opt);
+    });
+  }, 120);
+});
+
+/* ====== Older comments (keyset-paginated) ====== */
+document.addEventListener('click', async (e) => {
+  const btn = e.target.closest('[data-action="load-older-comments"]');
+  if (!btn) return;
+
+  btn.classList.add('disabled');
+  const resp = await fetch(`${btn.dataset.url}?before=${encodeURIComponent(btn.dataset.cursor)}`);
+  const json = await resp.json().catch(() => null);
+  btn.classList.remove('disabled');
+  if (!json || !json.ok) {
+    alert(json && json.error ? json.error : 'Failed to load comments');
+    return;
+  }
+
+  // page arrives newest-first; prepend each so the list stays oldest-first
+  const list = document.querySelector(btn.dataset.target);
+  json.comments.forEach(c => {
+    const li = document.createElement('li');
+    const who = document.createElement('strong');
+    who.textContent = c.user;
+    const when = document.createElement('small');
+    when.className = 'text-muted';
+    when.textContent = new Date(c.created_at).toLocaleString();
+    li.append(who, `: ${c.text} `, when);
+    list.prepend(li);
+  });
+
+  if (json.next) btn.dataset.cursor = json.next;
+  else btn.remove();
+});